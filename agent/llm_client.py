@@ -11,18 +11,39 @@ Owner: WS2
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import logging
+import os
+import random
 import re
+import threading
+import time
 from functools import lru_cache
-from typing import Any
-
-from openai import OpenAI
+from typing import Any, AsyncIterator
+
+import diskcache
+import httpx
+import orjson
+from json_repair import repair_json
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
 
 from core.config import (
     AZURE_API_KEY,
     AZURE_DEPLOYMENT,
     AZURE_ENDPOINT,
+    LLM_CACHE,
+    LLM_CACHE_DIR,
+    LLM_RPM,
 )
 
 logger = logging.getLogger(__name__)
@@ -30,61 +51,241 @@ logger = logging.getLogger(__name__)
 
 # ── Client singleton ────────────────────────────────────────────────────────
 
+# One keep-alive pool per process so the 2nd…Nth call of a pipeline run
+# skips the TCP + TLS handshake to the Azure endpoint.
+_HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=20,
+    max_connections=40,
+    keepalive_expiry=300,
+)
+_HTTP_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
 
-@lru_cache(maxsize=1)
-def get_client() -> OpenAI:
-    """Return a cached :class:`OpenAI` client pointing at Azure AI Foundry."""
+
+def _check_credentials() -> None:
     if not AZURE_ENDPOINT or not AZURE_API_KEY:
         raise RuntimeError(
             "AZURE_ENDPOINT and AZURE_API_KEY must be set in the environment. "
             "Copy .env.example to .env and fill in the values."
         )
+
+
+@lru_cache(maxsize=1)
+def get_client() -> OpenAI:
+    """Return a cached :class:`OpenAI` client pointing at Azure AI Foundry."""
+    _check_credentials()
     logger.info("LLM client → base_url=%s  model=%s", AZURE_ENDPOINT, AZURE_DEPLOYMENT)
     return OpenAI(
         base_url=AZURE_ENDPOINT,
         api_key=AZURE_API_KEY,
-        max_retries=5,          # handle 429s from S0 tier token-rate limits
+        max_retries=0,          # 429s / transient errors retried in _create_with_retry
+        http_client=DefaultHttpxClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT),
     )
 
 
+@lru_cache(maxsize=1)
+def get_async_client() -> AsyncOpenAI:
+    """Return a cached :class:`AsyncOpenAI` client for use inside the event loop."""
+    _check_credentials()
+    return AsyncOpenAI(
+        base_url=AZURE_ENDPOINT,
+        api_key=AZURE_API_KEY,
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT),
+    )
+
+
+# ── Rate limiting & retry ───────────────────────────────────────────────
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket whose refill rate adapts to 429 responses.
+
+    Additive increase on success, multiplicative decrease on throttle
+    (AIMD), so the request rate settles just below the tier's limit
+    instead of bouncing off it with retry storms.  Callers ``reserve()``
+    a slot and sleep for the returned delay, which works for both
+    threads and coroutines.
+    """
+
+    def __init__(
+        self,
+        rpm: float,
+        *,
+        burst: float = 5.0,
+        min_rpm: float = 6.0,
+        max_rpm: float | None = None,
+        increase_rpm: float = 1.0,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        self.rpm = rpm
+        self.min_rpm = min_rpm
+        self.max_rpm = max_rpm if max_rpm is not None else rpm * 4
+        self.increase_rpm = increase_rpm
+        self.decrease_factor = decrease_factor
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token; return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rpm / 60.0)
+            self._last = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens * 60.0 / self.rpm
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rpm = min(self.max_rpm, self.rpm + self.increase_rpm)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.rpm = max(self.min_rpm, self.rpm * self.decrease_factor)
+
+
+_limiter = AdaptiveRateLimiter(LLM_RPM)
+
+_MAX_ATTEMPTS = 6
+_BACKOFF_BASE_S = 1.0
+_BACKOFF_JITTER_S = 1.0
+_RETRYABLE = (RateLimitError, APIConnectionError, InternalServerError)
+
+
+def _retry_delay(attempt: int, exc: Exception) -> float:
+    """Jittered exponential backoff, never shorter than the server's Retry-After."""
+    delay = _BACKOFF_BASE_S * 2 ** attempt + random.uniform(0, _BACKOFF_JITTER_S)
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(delay, float(retry_after)) if retry_after else delay
+    except ValueError:  # HTTP-date form — fall back to our own backoff
+        return delay
+
+
+def _backoff(attempt: int, exc: Exception) -> float:
+    """Handle a retryable failure: adapt the limiter and return the sleep
+    before the next attempt, or re-raise *exc* once attempts are exhausted."""
+    if isinstance(exc, RateLimitError):
+        _limiter.on_throttle()
+    if attempt == _MAX_ATTEMPTS - 1:
+        raise exc
+    delay = _retry_delay(attempt, exc)
+    logger.warning("LLM call failed (%s); retry %d in %.1fs", type(exc).__name__, attempt + 1, delay)
+    return delay
+
+
+def _create_with_retry(client: OpenAI, **kwargs: Any) -> Any:
+    """``client.chat.completions.create`` behind the rate limiter, with retries."""
+    for attempt in range(_MAX_ATTEMPTS):
+        time.sleep(_limiter.reserve())
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except _RETRYABLE as exc:
+            time.sleep(_backoff(attempt, exc))
+        else:
+            _limiter.on_success()
+            return response
+
+
+async def _acreate_with_retry(client: AsyncOpenAI, **kwargs: Any) -> Any:
+    """Async counterpart of :func:`_create_with_retry`."""
+    for attempt in range(_MAX_ATTEMPTS):
+        await asyncio.sleep(_limiter.reserve())
+        try:
+            response = await client.chat.completions.create(**kwargs)
+        except _RETRYABLE as exc:
+            await asyncio.sleep(_backoff(attempt, exc))
+        else:
+            _limiter.on_success()
+            return response
+
+
+# ── Response cache (opt-in via LLM_CACHE=1) ─────────────────────────────────
+
+_CACHE_TTL_S = 86400  # 1 day
+
+
+@lru_cache(maxsize=1)
+def _get_response_cache() -> diskcache.Cache:
+    """Return the on-disk LLM response cache."""
+    return diskcache.Cache(os.path.expanduser(LLM_CACHE_DIR))
+
+
+def _cache_key(system: str, user: str, max_tokens: int, temperature: float) -> str | None:
+    """Hash the request into a cache key, or ``None`` when caching is off."""
+    if not LLM_CACHE:
+        return None
+    raw = "\x1f".join((system, user, AZURE_DEPLOYMENT, str(max_tokens), str(temperature)))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=32).hexdigest()
+
+
+def _cache_get(key: str | None) -> str | None:
+    """Cached response text for *key*, or ``None`` (also when caching is off)."""
+    return _get_response_cache().get(key) if key is not None else None
+
+
+def _finish_response(
+    content: str, reasoning: str, finish_reason: str | None, key: str | None
+) -> str:
+    """Resolve the final response text and cache it.
+
+    Reasoning models may return empty content with the answer in
+    ``reasoning_content``; that is used instead.  Empty responses are
+    logged and never cached.
+    """
+    if not content.strip() and reasoning:
+        logger.debug("Content empty; falling back to reasoning_content (%d chars)", len(reasoning))
+        content = reasoning
+
+    if not content.strip():
+        logger.warning("LLM returned empty response. finish_reason=%s", finish_reason)
+    elif key is not None:
+        _get_response_cache().set(key, content, expire=_CACHE_TTL_S)
+    return content
+
+
+def _messages(system: str, user: str) -> list[dict]:
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
 # ── JSON extraction helpers ─────────────────────────────────────────────────
 
 
+_FENCE_LEAD = re.compile(r"^```(?:json)?\s*")   # leading ```json or ```
+_FENCE_TAIL = re.compile(r"\s*```$")            # trailing ```
+
+
 def _strip_markdown_fences(text: str) -> str:
     """Remove ```json … ``` wrappers that LLMs sometimes add."""
-    text = text.strip()
-    # Strip leading ```json or ```
-    text = re.sub(r"^```(?:json)?\s*", "", text)
-    # Strip trailing ```
-    text = re.sub(r"\s*```$", "", text)
-    return text.strip()
+    return _FENCE_TAIL.sub("", _FENCE_LEAD.sub("", text.strip())).strip()
 
 
 def extract_json(text: str) -> Any:
     """Best-effort extraction of a JSON value from *text*.
 
-    1. Try direct ``json.loads`` on the stripped text.
-    2. Try after stripping markdown code fences.
-    3. Try extracting the first top-level ``[…]`` or ``{…}`` substring.
-    4. Try repairing truncated JSON (common with reasoning models).
-    5. Raise ``json.JSONDecodeError`` if all attempts fail.
+    1. Strip markdown code fences; if the result starts with ``{`` or
+       ``[``, try a direct ``orjson.loads``.
+    2. Try extracting the first top-level ``[…]`` or ``{…}`` substring.
+    3. Try repairing truncated / malformed JSON with ``json_repair``
+       (common with reasoning models).
+    4. Raise ``json.JSONDecodeError`` if all attempts fail.
     """
     text = text.strip()
-
-    # Attempt 1: direct parse
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-
-    # Attempt 2: strip markdown fences
     cleaned = _strip_markdown_fences(text)
-    try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
-        pass
 
-    # Attempt 3: find outermost JSON structure
+    # Attempt 1: direct parse — skipped for prose preambles ("Sure, here…")
+    if cleaned[:1] in ("{", "["):
+        try:
+            return orjson.loads(cleaned)
+        except orjson.JSONDecodeError:
+            pass
+
+    # Attempt 2: find outermost JSON structure
     # Try both brackets, pick the one that starts earliest (or spans more)
     candidates: list[tuple[int, int]] = []
     for open_ch, close_ch in [("[", "]"), ("{", "}")]:
@@ -97,101 +298,27 @@ def extract_json(text: str) -> Any:
     candidates.sort(key=lambda c: (c[0], -(c[1] - c[0])))
     for start, end in candidates:
         try:
-            return json.loads(cleaned[start : end + 1])
-        except json.JSONDecodeError:
+            return orjson.loads(cleaned[start : end + 1])
+        except orjson.JSONDecodeError:
             continue
 
-    # Attempt 4: repair truncated JSON — find the deepest valid prefix.
-    # This handles responses cut off at max_tokens.
+    # Attempt 3: repair truncated / malformed JSON (unterminated strings,
+    # trailing commas, responses cut off at max_tokens).
     first_brace = cleaned.find("{")
     if first_brace != -1:
         fragment = cleaned[first_brace:]
-        repaired = _repair_truncated_json(fragment)
-        if repaired is not None:
-            logger.info("Recovered truncated JSON (%d → %d chars)", len(fragment), len(repaired))
-            try:
-                return json.loads(repaired)
-            except json.JSONDecodeError:
-                pass
+        repaired = repair_json(fragment, return_objects=True)
+        # The fragment opens an object, so only a non-empty dict is a real
+        # recovery; prose around a stray "{" comes back as a list of text
+        # (or an empty object) and must still fail.
+        if isinstance(repaired, dict) and repaired:
+            logger.info("Recovered malformed JSON (%d chars)", len(fragment))
+            return repaired
 
     logger.warning("No valid JSON found in LLM response. First 300 chars: %s", text[:300])
     raise json.JSONDecodeError("No valid JSON found in LLM response", text, 0)
 
 
-def _repair_truncated_json(fragment: str) -> str | None:
-    """Try to close open brackets/braces for a truncated JSON string.
-
-    Works by counting nesting depth and trimming to the last complete
-    value, then appending the necessary closing characters.
-    """
-    # Walk backwards to find the last complete value boundary
-    # (after a comma, colon at the right nesting level)
-    depth_brace = 0
-    depth_bracket = 0
-    in_string = False
-    escape = False
-    last_safe = -1
-
-    for i, ch in enumerate(fragment):
-        if escape:
-            escape = False
-            continue
-        if ch == "\\":
-            escape = True
-            continue
-        if ch == '"':
-            in_string = not in_string
-            continue
-        if in_string:
-            continue
-        if ch == "{":
-            depth_brace += 1
-        elif ch == "}":
-            depth_brace -= 1
-            if depth_brace >= 0:
-                last_safe = i
-        elif ch == "[":
-            depth_bracket += 1
-        elif ch == "]":
-            depth_bracket -= 1
-            if depth_bracket >= 0:
-                last_safe = i
-
-    if last_safe <= 0:
-        return None
-
-    # Trim to last_safe and close all open brackets/braces
-    trimmed = fragment[: last_safe + 1]
-    # Count remaining open brackets
-    open_braces = 0
-    open_brackets = 0
-    in_str = False
-    esc = False
-    for ch in trimmed:
-        if esc:
-            esc = False
-            continue
-        if ch == "\\":
-            esc = True
-            continue
-        if ch == '"':
-            in_str = not in_str
-            continue
-        if in_str:
-            continue
-        if ch == "{":
-            open_braces += 1
-        elif ch == "}":
-            open_braces -= 1
-        elif ch == "[":
-            open_brackets += 1
-        elif ch == "]":
-            open_brackets -= 1
-
-    closing = "]" * open_brackets + "}" * open_braces
-    return trimmed + closing
-
-
 # ── Core LLM call (simple: system + user → text) ───────────────────────────
 
 
@@ -207,28 +334,74 @@ def call_llm(
     Handles reasoning models (like Grok) that may put chain-of-thought
     in ``reasoning_content`` and the final answer in ``content``.
     """
-    client = get_client()
-    response = client.chat.completions.create(
+    key = _cache_key(system, user, max_tokens, temperature)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    response = _create_with_retry(
+        get_client(),
         model=AZURE_DEPLOYMENT,
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
+        messages=_messages(system, user),
         max_tokens=max_tokens,
         temperature=temperature,
     )
-    msg = response.choices[0].message
-    content = msg.content or ""
+    choice = response.choices[0]
+    return _finish_response(
+        choice.message.content or "",
+        getattr(choice.message, "reasoning_content", None) or "",
+        choice.finish_reason,
+        key,
+    )
 
-    # Reasoning models may return empty content with reasoning_content
-    if not content.strip():
-        reasoning = getattr(msg, "reasoning_content", None) or ""
-        if reasoning:
-            logger.debug("Content empty; falling back to reasoning_content (%d chars)", len(reasoning))
-            content = reasoning
 
-    if not content.strip():
-        logger.warning("LLM returned empty response. finish_reason=%s",
-                       response.choices[0].finish_reason)
+async def acall_llm_stream(
+    system: str,
+    user: str,
+    *,
+    max_tokens: int = 8192,
+    temperature: float = 0.2,
+) -> AsyncIterator[str]:
+    """Stream a chat completion on :class:`AsyncOpenAI`, yielding content deltas.
 
-    return content
+    Same contract as :func:`call_llm`: if the model streams no ``content``
+    at all, the accumulated ``reasoning_content`` is yielded once at the end.
+    Runs inside the event loop without tying up a worker thread or blocking
+    other coroutines (step callbacks, heartbeats).
+    """
+    key = _cache_key(system, user, max_tokens, temperature)
+    cached = _cache_get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    stream = await _acreate_with_retry(
+        get_async_client(),
+        model=AZURE_DEPLOYMENT,
+        messages=_messages(system, user),
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True,
+    )
+
+    content_parts: list[str] = []
+    reasoning_parts: list[str] = []
+    finish_reason = None
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish_reason = choice.finish_reason or finish_reason
+        delta = choice.delta
+        if delta.content:
+            content_parts.append(delta.content)
+            yield delta.content
+        else:
+            reasoning = getattr(delta, "reasoning_content", None)
+            if reasoning:
+                reasoning_parts.append(reasoning)
+
+    content = "".join(content_parts)
+    final = _finish_response(content, "".join(reasoning_parts), finish_reason, key)
+    if final is not content:
+        yield final  # reasoning_content fallback: nothing was streamed as content
@@ -12,15 +12,20 @@ a complete AgentOutput.
 from __future__ import annotations
 
 import asyncio
-import json
+import functools
 import logging
+import os
 import re
 import time
 import uuid
-from pathlib import Path
-from typing import Any, Callable, Coroutine, Optional
+from contextlib import contextmanager
+from itertools import chain
+from typing import Any, Callable, Coroutine, Iterator, Optional
 
-from agent.llm_client import call_llm, extract_json
+import orjson
+from pydantic import TypeAdapter
+
+from agent.llm_client import acall_llm_stream, extract_json
 from agent.state import PipelineState
 from core.models import (
     AgentOutput,
@@ -35,6 +40,7 @@ from core.models import (
 )
 from core.session_manager import SessionManager
 
+import tools.combined_extract as combined_extract_tool
 import tools.disease_match as disease_match_tool
 import tools.excluded_extract as excluded_extract_tool
 import tools.hpo_lookup as hpo_lookup_tool
@@ -44,16 +50,19 @@ import tools.timing_extract as timing_extract_tool
 
 logger = logging.getLogger(__name__)
 
+# LLM-supplied ``what_would_change`` is validated on its own, since the
+# final AgentOutput is assembled with model_construct.
+_STR_LIST = TypeAdapter(list[str])
+
 # ── Prompt cache ────────────────────────────────────────────────────────
-_FINAL_PROMPT_PATH = Path(__file__).resolve().parent / "prompts" / "final_reasoning.txt"
-_FINAL_PROMPT_CACHE: str | None = None
+_FINAL_PROMPT_PATH = os.path.join(os.path.dirname(__file__), "prompts", "final_reasoning.txt")
 
 
+@functools.cache
 def _load_final_prompt() -> str:
-    global _FINAL_PROMPT_CACHE
-    if _FINAL_PROMPT_CACHE is None:
-        _FINAL_PROMPT_CACHE = _FINAL_PROMPT_PATH.read_text(encoding="utf-8")
-    return _FINAL_PROMPT_CACHE
+    # The prompt never changes at runtime — read it once per process.
+    with open(_FINAL_PROMPT_PATH, "rb") as fh:
+        return fh.read().decode("utf-8")
 
 
 # ── WS1 graceful-fallback helpers ───────────────────────────────────────
@@ -113,6 +122,36 @@ def _log_tool(
     )
 
 
+@contextmanager
+def _timed_tool(
+    state: PipelineState,
+    session_mgr: SessionManager,
+    tool_name: str,
+    input_data: dict,
+) -> Iterator[dict]:
+    """Time the enclosed block and log it via :func:`_log_tool`.
+
+    The block stores its output in ``slot["result"]``::
+
+        with _timed_tool(state, mgr, "red_flag", {...}) as slot:
+            slot["result"] = _safe_call(...)
+    """
+    slot: dict = {}
+    t0 = time.perf_counter_ns()
+    yield slot
+    _log_tool(state, session_mgr, tool_name, input_data, slot.get("result"), (time.perf_counter_ns() - t0) // 1_000_000)
+
+
+# ── Concurrent step helper ──────────────────────────────────────────────
+
+
+async def _timed_thread(fn: Callable, *args: Any, **kwargs: Any) -> tuple[Any, int]:
+    """Run blocking *fn* in a worker thread; return ``(result, duration_ms)``."""
+    t0 = time.perf_counter_ns()
+    result = await asyncio.to_thread(fn, *args, **kwargs)
+    return result, (time.perf_counter_ns() - t0) // 1_000_000
+
+
 # ── Step callback helper ────────────────────────────────────────────────
 
 StepCallback = Optional[Callable[[str, Any], Coroutine[Any, Any, None] | None]]
@@ -180,12 +219,11 @@ def _build_context_packet(state: PipelineState, patient_input: PatientInput) ->
     ]
 
     # Disease candidates — top 5 with matched term labels for reasoning
-    # Build HPO ID → label lookup from patient matches
-    id_to_label = {m.hpo_id: m.label for m in state.hpo_matches if m.hpo_id and m.label}
+    id_to_label = state.hpo_label_by_id
 
     candidates_slim = []
     for d in state.diseases[:5]:
-        matched_labels = [id_to_label.get(t, t) for t in d.matched_terms]
+        matched_labels = [id_to_label.get(t) or t for t in d.matched_terms]
         candidates_slim.append({
             "disease_name": d.disease_name,
             "disease_id": d.disease_id,
@@ -268,24 +306,38 @@ def _build_degraded_output(state: PipelineState) -> dict:
 # ── Final LLM reasoning call ────────────────────────────────────────────
 
 
-def _call_final_reasoning(context_packet: dict) -> dict:
-    """Single LLM call: send the context packet and parse the structured output."""
+def _serialise_packet(context_packet: dict) -> str:
+    """Serialise the context packet once; the string goes straight into the prompt."""
+    return orjson.dumps(context_packet, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+async def _call_final_reasoning(packet_json: str) -> dict:
+    """Single LLM call: stream the response and parse the structured output.
+
+    *packet_json* is the already-serialised context packet.  Runs on the
+    async client so the event loop stays free while the model streams;
+    the JSON is parsed once the stream completes.
+    """
     prompt = _load_final_prompt()
-    raw = call_llm(
+    parts: list[str] = []
+    async for token in acall_llm_stream(
         system=prompt,
-        user=json.dumps(context_packet, default=str),
+        user=packet_json,
         max_tokens=16384,  # Slimmed prompt; reasoning model still needs headroom
-    )
-    return extract_json(raw)
+    ):
+        parts.append(token)
+    return extract_json("".join(parts))
 
 
 # ── Free-text splitting ─────────────────────────────────────────────────
 
+# Common delimiters between symptoms in a clinical note
+_SPLIT_RE = re.compile(r"[,;.]|\band\b")
+
+
 def _split_free_text(text: str) -> list[str]:
     """Split clinical free text into rough symptom chunks."""
-    # Split on common delimiters
-    chunks = re.split(r"[,;.]|\band\b", text)
-    return [c.strip() for c in chunks if c.strip() and len(c.strip()) > 2]
+    return [c for chunk in _SPLIT_RE.split(text) if len(c := chunk.strip()) > 2]
 
 
 # ═════════════════════════════════════════════════════════════════════════
@@ -328,28 +380,27 @@ async def run_pipeline(
     _safe_session(session_mgr.create_session, state.session_id, state.patient_input_raw)
 
     # ── Step 1: Red Flag Check (ALWAYS FIRST) ───────────────────────────
-    t0 = time.perf_counter_ns()
-    state.red_flags = _safe_call(
-        red_flag_tool.run,
-        patient_input.hpo_terms,
-        data.get("ontology"),
-        default=[],
-    )
-    _log_tool(state, session_mgr, "red_flag", {"hpo_terms": patient_input.hpo_terms}, state.red_flags, int((time.perf_counter_ns() - t0) / 1_000_000))
+    with _timed_tool(state, session_mgr, "red_flag", {"hpo_terms": patient_input.hpo_terms}) as slot:
+        state.red_flags = slot["result"] = _safe_call(
+            red_flag_tool.run,
+            patient_input.hpo_terms,
+            data.get("ontology"),
+            default=[],
+        )
     await _fire_callback(step_callback, "Red Flag Check", state.red_flags)
 
     # Early exit on URGENT red flags
     urgent_flags = [f for f in state.red_flags if f.severity == "URGENT"]
     if urgent_flags:
         logger.warning("URGENT red flags detected — returning early")
-        return AgentOutput(
+        return AgentOutput.model_construct(
             session_id=state.session_id,
             red_flags=state.red_flags,
             patient_hpo_observed=[],
             disease_candidates=[],
             disease_profiles=[],
             data_completeness=0.0,
-            uncertainty=UncertaintySummary(
+            uncertainty=UncertaintySummary.model_construct(
                 known=[f"URGENT: {f.flag_label}" for f in urgent_flags],
                 missing=["Full analysis not performed due to urgent flags"],
                 ambiguous=[],
@@ -357,111 +408,137 @@ async def run_pipeline(
         )
 
     # ── Step 2: HPO Mapping ─────────────────────────────────────────────
-    raw_texts_to_lookup: list[str] = []
-
-    # Already-supplied HPO IDs → pass through for enrichment
-    if patient_input.hpo_terms:
-        raw_texts_to_lookup.extend(patient_input.hpo_terms)
-
-    # Free text → split into chunks
-    if patient_input.free_text:
-        raw_texts_to_lookup.extend(_split_free_text(patient_input.free_text))
-
-    t0 = time.perf_counter_ns()
-    hpo_results: list[HPOMatch] = _safe_call(
-        hpo_lookup_tool.run,
-        raw_texts_to_lookup,
-        data,
-        default=[],
-    )
-    _log_tool(state, session_mgr, "hpo_lookup", {"raw_texts": raw_texts_to_lookup}, hpo_results, int((time.perf_counter_ns() - t0) / 1_000_000))
+    # Already-supplied HPO IDs (passed through for enrichment) + free-text
+    # chunks, deduplicated case-insensitively; first-seen casing wins.
+    unique_texts: dict[str, str] = {}
+    for text in chain(patient_input.hpo_terms or [], _split_free_text(patient_input.free_text or "")):
+        unique_texts.setdefault(text.strip().lower(), text)
+    raw_texts_to_lookup = list(unique_texts.values())
+
+    with _timed_tool(state, session_mgr, "hpo_lookup", {"raw_texts": raw_texts_to_lookup}) as slot:
+        hpo_results: list[HPOMatch] = _safe_call(
+            hpo_lookup_tool.run,
+            raw_texts_to_lookup,
+            data,
+            default=[],
+        )
+        slot["result"] = hpo_results
 
     # Deduplicate by hpo_id
-    seen_ids: set[str] = set()
-    for m in hpo_results:
-        if m.hpo_id and m.hpo_id not in seen_ids:
-            state.hpo_matches.append(m)
-            seen_ids.add(m.hpo_id)
+    state.set_hpo_matches(hpo_results)
 
     await _fire_callback(step_callback, "HPO Mapping", state.hpo_matches)
 
-    # ── Step 3: Disease Matching (initial) ──────────────────────────────
-    hpo_ids = [m.hpo_id for m in state.hpo_matches if m.hpo_id]
+    # ── Step 3 + 4a/4b: Disease Matching ‖ Phenotype Extraction ─────────
+    # The initial disease match only needs the HPO IDs, and the LLM
+    # extraction steps only need the raw note, so they run concurrently.
+    hpo_ids = state.hpo_ids
+    free_text = patient_input.free_text
+    has_free_text = bool(free_text and free_text.strip())
 
-    t0 = time.perf_counter_ns()
-    state.diseases = _safe_call(
+    disease_task = asyncio.create_task(_timed_thread(
+        _safe_call,
         disease_match_tool.run,
         hpo_ids,
         [],  # no exclusions yet
         data,
         default=[],
-    )
-    _log_tool(state, session_mgr, "disease_match", {"hpo_ids": hpo_ids, "excluded_ids": []}, state.diseases, int((time.perf_counter_ns() - t0) / 1_000_000))
+    ))
+    if has_free_text:
+        hpo_labels = state.hpo_labels
+        # 4a + 4b: excluded & timing extraction share one LLM call
+        extraction = asyncio.create_task(_timed_thread(
+            combined_extract_tool.run,
+            free_text,
+            hpo_labels,
+            data.get("synonym_index", {}),
+        ))
+
+    state.diseases, elapsed = await disease_task
+    _log_tool(state, session_mgr, "disease_match", {"hpo_ids": hpo_ids, "excluded_ids": []}, state.diseases, elapsed)
     await _fire_callback(step_callback, "Disease Matching", state.diseases)
 
-    # ── Step 4: Phenotype Extraction (only with free text) ──────────────
-    if patient_input.free_text and patient_input.free_text.strip():
-        free_text = patient_input.free_text
-        hpo_labels = [m.label for m in state.hpo_matches if m.label]
-
-        # 4a + 4b: Run excluded & timing extraction concurrently
-        t0 = time.perf_counter_ns()
-        excluded_result, timing_result = await asyncio.gather(
-            asyncio.to_thread(
-                excluded_extract_tool.run,
-                free_text,
-                data.get("synonym_index", {}),
-            ),
-            asyncio.to_thread(
-                timing_extract_tool.run,
-                free_text,
-                hpo_labels,
-            ),
-        )
-        elapsed = int((time.perf_counter_ns() - t0) / 1_000_000)
-
-        state.excluded = excluded_result
-        state.timing = timing_result
-
-        _log_tool(state, session_mgr, "excluded_extract", {"note_length": len(free_text)}, state.excluded, elapsed)
-        _log_tool(state, session_mgr, "timing_extract", {"note_length": len(free_text), "hpo_labels": hpo_labels}, state.timing, elapsed)
-
-        await _fire_callback(step_callback, "Phenotype Extraction", {
-            "excluded": state.excluded,
-            "timing": state.timing,
-        })
+    # Speculatively fetch profiles for the initial top 5 while extraction
+    # runs; reused in Step 5 if exclusions don't change the ranking.
+    initial_top_ids = [d.disease_id for d in state.diseases[:5]]
+    profiles_task = asyncio.create_task(_timed_thread(
+        _safe_call,
+        orphanet_fetch_tool.run,
+        initial_top_ids,
+        data,
+        default=[],
+    )) if initial_top_ids else None
 
-        # 4c: Re-run disease match with exclusions if any mapped
-        excluded_hpo_ids = [
-            e.mapped_hpo_term
-            for e in state.excluded
-            if e.mapped_hpo_term
-        ]
-        if excluded_hpo_ids:
-            t0 = time.perf_counter_ns()
-            refined = _safe_call(
-                disease_match_tool.run,
-                hpo_ids,
-                excluded_hpo_ids,
-                data,
-                default=[],
-            )
-            if refined:
-                state.diseases = refined
-            _log_tool(state, session_mgr, "disease_match_refined", {"hpo_ids": hpo_ids, "excluded_ids": excluded_hpo_ids}, state.diseases, int((time.perf_counter_ns() - t0) / 1_000_000))
-
-    # ── Step 5: Disease Profile Fetch ───────────────────────────────────
-    top_disease_ids = [d.disease_id for d in state.diseases[:5]]
-    if top_disease_ids:
-        t0 = time.perf_counter_ns()
-        state.profiles = _safe_call(
-            orphanet_fetch_tool.run,
-            top_disease_ids,
-            data,
-            default=[],
-        )
-        _log_tool(state, session_mgr, "orphanet_fetch", {"disease_ids": top_disease_ids}, state.profiles, int((time.perf_counter_ns() - t0) / 1_000_000))
-        await _fire_callback(step_callback, "Disease Profile Fetch", state.profiles)
+    try:
+        # ── Step 4: Phenotype Extraction (only with free text) ──────────
+        if has_free_text:
+            combined, combined_ms = await extraction
+            if combined is not None:
+                state.excluded, state.timing = combined
+                excluded_ms = timing_ms = combined_ms
+            else:
+                # Combined response unusable — fall back to the two single-task calls
+                (state.excluded, excluded_ms), (state.timing, timing_ms) = await asyncio.gather(
+                    _timed_thread(
+                        excluded_extract_tool.run,
+                        free_text,
+                        data.get("synonym_index", {}),
+                    ),
+                    _timed_thread(
+                        timing_extract_tool.run,
+                        free_text,
+                        hpo_labels,
+                    ),
+                )
+
+            _log_tool(state, session_mgr, "excluded_extract", {"note_length": len(free_text)}, state.excluded, excluded_ms)
+            _log_tool(state, session_mgr, "timing_extract", {"note_length": len(free_text), "hpo_labels": hpo_labels}, state.timing, timing_ms)
+
+            await _fire_callback(step_callback, "Phenotype Extraction", {
+                "excluded": state.excluded,
+                "timing": state.timing,
+            })
+
+            # 4c: Re-run disease match with exclusions if any mapped
+            excluded_hpo_ids = [
+                e.mapped_hpo_term
+                for e in state.excluded
+                if e.mapped_hpo_term
+            ]
+            if excluded_hpo_ids:
+                with _timed_tool(state, session_mgr, "disease_match_refined", {"hpo_ids": hpo_ids, "excluded_ids": excluded_hpo_ids}) as slot:
+                    refined = _safe_call(
+                        disease_match_tool.run,
+                        hpo_ids,
+                        excluded_hpo_ids,
+                        data,
+                        default=[],
+                    )
+                    if refined:
+                        state.diseases = refined
+                    slot["result"] = state.diseases
+
+        # ── Step 5: Disease Profile Fetch ───────────────────────────────
+        top_disease_ids = [d.disease_id for d in state.diseases[:5]]
+        if profiles_task is not None and top_disease_ids == initial_top_ids:
+            state.profiles, elapsed = await profiles_task
+            _log_tool(state, session_mgr, "orphanet_fetch", {"disease_ids": top_disease_ids}, state.profiles, elapsed)
+            await _fire_callback(step_callback, "Disease Profile Fetch", state.profiles)
+        elif top_disease_ids:
+            with _timed_tool(state, session_mgr, "orphanet_fetch", {"disease_ids": top_disease_ids}) as slot:
+                state.profiles = slot["result"] = _safe_call(
+                    orphanet_fetch_tool.run,
+                    top_disease_ids,
+                    data,
+                    default=[],
+                )
+            await _fire_callback(step_callback, "Disease Profile Fetch", state.profiles)
+    finally:
+        # Drop a prefetch that was never awaited (ranking changed after
+        # exclusions, or a step above raised). This only discards the result:
+        # the to_thread worker can't be interrupted and finishes its fetch.
+        if profiles_task is not None and not profiles_task.done():
+            profiles_task.cancel()
 
     # ── Step 6: Data Completeness ───────────────────────────────────────
     state.data_completeness = _compute_completeness(state, patient_input)
@@ -471,7 +548,7 @@ async def run_pipeline(
     _safe_session(session_mgr.set_context, state.session_id, context_packet)
 
     try:
-        llm_output = _call_final_reasoning(context_packet)
+        llm_output = await _call_final_reasoning(_serialise_packet(context_packet))
     except Exception:
         logger.exception("Final reasoning failed — building degraded output")
         llm_output = _build_degraded_output(state)
@@ -485,7 +562,7 @@ async def run_pipeline(
         next_best_steps = [
             NextStep(**s) for s in llm_output.get("next_best_steps", [])
         ]
-        what_would_change = llm_output.get("what_would_change", [])
+        what_would_change = _STR_LIST.validate_python(llm_output.get("what_would_change", []))
         uncertainty_raw = llm_output.get("uncertainty", {})
         uncertainty = UncertaintySummary(
             known=uncertainty_raw.get("known", []),
@@ -500,7 +577,9 @@ async def run_pipeline(
         what_would_change = degraded["what_would_change"]
         uncertainty = UncertaintySummary(**degraded["uncertainty"])
 
-    output = AgentOutput(
+    # Every field is already a validated model (or a plain value the
+    # orchestrator computed), so assemble without re-validating.
+    output = AgentOutput.model_construct(
         session_id=state.session_id,
         patient_hpo_observed=state.hpo_matches,
         patient_hpo_excluded=state.excluded,
@@ -517,7 +596,7 @@ async def run_pipeline(
     )
 
     # Store final output in Redis
-    _safe_session(session_mgr.set_output, state.session_id, output.model_dump())
+    _safe_session(session_mgr.set_output, state.session_id, output)
 
     await _fire_callback(step_callback, "Complete", output)
 
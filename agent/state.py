@@ -44,11 +44,31 @@ class PipelineState:
     reanalysis: Optional[ReanalysisResult] = None                      # Future hook
     data_completeness: float = 0.0                                     # Step 6
 
+    # ── Derived from hpo_matches (maintained by set_hpo_matches) ────────
+    hpo_ids: list[str] = field(default_factory=list)
+    hpo_labels: list[str] = field(default_factory=list)
+    hpo_label_by_id: dict[str, str] = field(default_factory=dict)
+
     # ── Logging ─────────────────────────────────────────────────────────
     tool_log: list[dict] = field(default_factory=list)
 
     # ── Helpers ─────────────────────────────────────────────────────────
 
+    def set_hpo_matches(self, matches: list[HPOMatch]) -> None:
+        """Replace ``hpo_matches`` with *matches* deduplicated by HPO ID.
+
+        Single dict pass (first occurrence wins); the derived views are
+        rebuilt from it.
+        """
+        by_id: dict[str, HPOMatch] = {}
+        for m in matches:
+            if m.hpo_id:
+                by_id.setdefault(m.hpo_id, m)
+        self.hpo_matches = list(by_id.values())
+        self.hpo_ids = list(by_id)
+        self.hpo_label_by_id = {hpo_id: m.label for hpo_id, m in by_id.items()}
+        self.hpo_labels = [m.label for m in self.hpo_matches if m.label]
+
     def snapshot(self) -> dict:
         """Return a plain-dict snapshot suitable for JSON serialisation."""
         return {
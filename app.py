@@ -11,6 +11,8 @@ and uses chainlit_utils.formatters for HTML rendering.
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import logging
 import re
@@ -24,12 +26,13 @@ from core.data_loader import load_all
 from core.database import get_db
 from core.session_manager import SessionManager
 from core.config import REDIS_URL
-from core.models import PatientInput
+from core.models import PatientInput, build_models
 from agent.pipeline import run_pipeline
 from chainlit_utils.formatters import (
     format_agent_output,
     format_welcome_card,
     format_patient_load_card,
+    _esc,
     _resolve_label,
 )
 
@@ -37,8 +40,15 @@ logger = logging.getLogger(__name__)
 
 # ---------- Globals loaded once at startup ----------
 DATA: dict | None = None
-SESSION_MGR: SessionManager | None = None
 PATIENTS: list[dict] = []
+# (label, payload) for the patient selector buttons — built once with PATIENTS
+PATIENT_ACTIONS: list[tuple[str, dict]] = []
+# HPO ID → label for the formatters (load_all's "hpo_labels")
+HPO_LABELS: dict[str, str] = {}
+# Welcome dashboard HTML — its inputs never change after load_all
+WELCOME_HTML: str = ""
+# Background load of DATA, started at app startup (see _ensure_data)
+_DATA_TASK: asyncio.Task | None = None
 
 STEP_EMOJIS = {
     "Red Flag Check": "\U0001f6a8",
@@ -49,24 +59,87 @@ STEP_EMOJIS = {
     "Complete": "\U0001f9e0",
 }
 
+_HPO_RE = re.compile(r"HP:\d{7}")
+
 
 # ═══════════════════════════════════════════════════════════════════════
 # STARTUP
 # ═══════════════════════════════════════════════════════════════════════
 
+def _build_patient_actions(patients: list[dict]) -> list[tuple[str, dict]]:
+    """Pre-bake (label, payload) pairs for the first 15 patient buttons."""
+    actions = []
+    for i, patient in enumerate(patients[:15]):
+        pid = patient.get("_id", f"patient_{i+1}")
+        age = patient.get("age", "?")
+        sex = patient.get("sex", "?")
+        name = patient.get("diagnosis_name", "Unknown")
+        hpo_count = len(patient.get("hpo_terms", []))
+        label = f"{pid}: {age}yo {sex} — {name} ({hpo_count} HPO)"
+        actions.append((label, {"patient_index": i, "patient_id": str(pid)}))
+    return actions
+
+
+def _merge_unique(first: list[str], second: list[str]) -> list[str]:
+    """Concatenate two term lists, dropping duplicates but keeping order."""
+    return list(dict.fromkeys([*first, *second]))
+
+
+@functools.cache
+def _data() -> dict:
+    """Load reference data (real MongoDB) once and derive the startup globals."""
+    global DATA, PATIENTS, PATIENT_ACTIONS, HPO_LABELS, WELCOME_HTML
+    build_models()
+    DATA = load_all(get_db())
+    PATIENTS = DATA.get("patients", [])
+    PATIENT_ACTIONS = _build_patient_actions(PATIENTS)
+    HPO_LABELS = DATA["hpo_labels"]
+    WELCOME_HTML = format_welcome_card(PATIENTS, HPO_LABELS)
+    return DATA
+
+
+@functools.cache
+def _session_mgr() -> SessionManager:
+    """Process-wide SessionManager, so all sessions share one Redis pool."""
+    return SessionManager(REDIS_URL)
+
+
+def _start_data_load() -> asyncio.Task:
+    """Start (or return) the background reference-data load.
+
+    The Mongo load is slow; running it in a worker thread keeps the event
+    loop free so other connecting users aren't stalled behind it.  A
+    failed load is retried on the next call.
+    """
+    global _DATA_TASK
+    task = _DATA_TASK
+    if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+        task = _DATA_TASK = asyncio.create_task(asyncio.to_thread(_data))
+    return task
+
+
+async def _ensure_data() -> dict:
+    """Wait for reference data — a no-op once the startup load has finished."""
+    return await _start_data_load()
+
+
+@cl.on_app_startup
+async def on_app_startup():
+    """Kick off the data load without blocking server startup."""
+    _start_data_load()
+
+
+@functools.cache
+def _patient_load_html(patient_index: int) -> str:
+    """Rendered patient-load card for PATIENTS[patient_index] (cached)."""
+    return format_patient_load_card(PATIENTS[patient_index], HPO_LABELS)
+
+
 @cl.on_chat_start
 async def on_chat_start():
     """Initialise data and session on new conversation."""
-    global DATA, SESSION_MGR, PATIENTS
-
-    # Load reference data once (real MongoDB)
-    if DATA is None:
-        db = get_db()
-        DATA = load_all(db)
-        PATIENTS = DATA.get("patients", [])
-
-    if SESSION_MGR is None:
-        SESSION_MGR = SessionManager(REDIS_URL)
+    await _ensure_data()
+    _session_mgr()
 
     # Generate session ID
     session_id = str(uuid.uuid4())
@@ -74,30 +147,15 @@ async def on_chat_start():
     cl.user_session.set("current_hpo_terms", [])
     cl.user_session.set("current_patient", None)
 
-    # Build patient selector action buttons (functional clicks)
-    actions = []
-    for i, patient in enumerate(PATIENTS[:15]):
-        pid = patient.get("_id", f"patient_{i+1}")
-        age = patient.get("age", "?")
-        sex = patient.get("sex", "?")
-        name = patient.get("diagnosis_name", "Unknown")
-        hpo_count = len(patient.get("hpo_terms", []))
-        label = f"{pid}: {age}yo {sex} — {name} ({hpo_count} HPO)"
-
-        actions.append(
-            cl.Action(
-                name="load_patient",
-                payload={"patient_index": i, "patient_id": str(pid)},
-                label=label,
-            )
-        )
-
-    # Build styled HTML welcome dashboard
-    hpo_index = DATA.get("hpo_index", {})
-    welcome_html = format_welcome_card(PATIENTS, hpo_index)
+    # Patient selector action buttons (functional clicks). Actions are
+    # bound to a message, so only the label/payload pairs are shared.
+    actions = [
+        cl.Action(name="load_patient", payload=payload, label=label)
+        for label, payload in PATIENT_ACTIONS
+    ]
 
     await cl.Message(
-        content=welcome_html,
+        content=WELCOME_HTML,
         actions=actions,
     ).send()
 
@@ -126,9 +184,7 @@ async def on_load_patient(action: cl.Action):
     cl.user_session.set("current_patient", patient)
 
     # Send styled patient-load card
-    hpo_index = DATA.get("hpo_index", {})
-    load_html = format_patient_load_card(patient, hpo_index)
-    await cl.Message(content=load_html).send()
+    await cl.Message(content=_patient_load_html(patient_index)).send()
 
     # Build input and run
     patient_input = PatientInput(
@@ -161,9 +217,7 @@ async def on_message(message: cl.Message):
             sex = patient.get("sex")
             cl.user_session.set("current_hpo_terms", list(hpo_terms))
             cl.user_session.set("current_patient", patient)
-            hpo_index = DATA.get("hpo_index", {})
-            load_html = format_patient_load_card(patient, hpo_index)
-            await cl.Message(content=load_html).send()
+            await cl.Message(content=_patient_load_html(idx)).send()
             patient_input = PatientInput(
                 hpo_terms=list(hpo_terms),
                 age=age,
@@ -173,14 +227,14 @@ async def on_message(message: cl.Message):
         return
 
     # Check for HPO term pattern
-    hpo_pattern = re.findall(r"HP:\d{7}", text)
+    hpo_pattern = _HPO_RE.findall(text) if "HP:" in text else []
 
     current_terms = cl.user_session.get("current_hpo_terms") or []
     patient_meta = cl.user_session.get("current_patient")
 
     if hpo_pattern:
         # HPO term input — merge with any existing session terms
-        merged = list(set(current_terms + hpo_pattern))
+        merged = _merge_unique(current_terms, hpo_pattern)
         cl.user_session.set("current_hpo_terms", merged)
 
         patient_input = PatientInput(
@@ -204,6 +258,22 @@ async def on_message(message: cl.Message):
 # ADD HPO TERM CALLBACK (assess chip click)
 # ═══════════════════════════════════════════════════════════════════════
 
+# "Phenotype added" loading card — %s slots: label, hpo_id (both escaped)
+_HPO_ADDED_TEMPLATE = (
+    '<div class="patient-load-card">'
+    '<div class="loading-spinner"></div>'
+    '<div class="pl-inner">'
+    '<div class="pl-top">'
+    '<div style="width:32px;height:32px;border-radius:8px;background:var(--green-a);'
+    'color:var(--green);display:flex;align-items:center;justify-content:center;font-size:14px;">+</div>'
+    '<div>'
+    '<div class="pl-action" style="color:var(--green);">Phenotype added — re-running analysis</div>'
+    '<div class="cp-name">%s</div>'
+    '<div class="cp-sub" style="font-family:var(--mono);font-size:10px;">%s</div>'
+    '</div></div></div></div>'
+)
+
+
 @cl.action_callback("add_hpo_term")
 async def on_add_hpo_term(action: cl.Action):
     """Handle assess chip click — add HPO term and re-run."""
@@ -218,21 +288,7 @@ async def on_add_hpo_term(action: cl.Action):
         cl.user_session.set("current_hpo_terms", current_terms)
 
     # Send a styled "phenotype added" card (full-viewport loading state)
-    await cl.Message(
-        content=(
-            '<div class="patient-load-card">'
-            '<div class="loading-spinner"></div>'
-            '<div class="pl-inner">'
-            '<div class="pl-top">'
-            '<div style="width:32px;height:32px;border-radius:8px;background:var(--green-a);'
-            'color:var(--green);display:flex;align-items:center;justify-content:center;font-size:14px;">+</div>'
-            '<div>'
-            f'<div class="pl-action" style="color:var(--green);">Phenotype added — re-running analysis</div>'
-            f'<div class="cp-name">{label}</div>'
-            f'<div class="cp-sub" style="font-family:var(--mono);font-size:10px;">{hpo_id}</div>'
-            '</div></div></div></div>'
-        )
-    ).send()
+    await cl.Message(content=_HPO_ADDED_TEMPLATE % (_esc(label), _esc(hpo_id))).send()
 
     patient_input = PatientInput(
         hpo_terms=current_terms,
@@ -247,39 +303,77 @@ async def on_add_hpo_term(action: cl.Action):
 # CORE ANALYSIS RUNNER
 # ═══════════════════════════════════════════════════════════════════════
 
+_STEP_PREVIEW_MAX = 10
+
+
+def _preview_list(items: list) -> str:
+    """Compact JSON of the first few step results, with a count of the rest."""
+    body = json.dumps(
+        [r.model_dump() if hasattr(r, "model_dump") else str(r) for r in items[:_STEP_PREVIEW_MAX]],
+        separators=(",", ":"), default=str,
+    )
+    extra = len(items) - _STEP_PREVIEW_MAX
+    return f"{body}  …(+{extra} more)" if extra > 0 else body
+
+
+def _build_assess_actions(candidates: list, hpo_labels: dict[str, str], limit: int = 8) -> list[cl.Action]:
+    """Action buttons for missing phenotypes (assess chips), capped at *limit*.
+
+    Each term ID is resolved once; display labels are deduped
+    case-insensitively.
+    """
+    actions: list[cl.Action] = []
+    seen_ids: set[str] = set()
+    seen_labels: set[str] = set()
+    for dc in candidates:
+        for term_id in dc.missing_terms:
+            if term_id in seen_ids:
+                continue
+            seen_ids.add(term_id)
+            label = _resolve_label(hpo_labels, term_id)
+            key = label.lower()
+            if key in seen_labels:
+                continue
+            seen_labels.add(key)
+            actions.append(
+                cl.Action(
+                    name="add_hpo_term",
+                    payload={"hpo_id": term_id, "label": label},
+                    label=f"+ {label}",
+                )
+            )
+            if len(actions) == limit:
+                return actions
+    return actions
+
+
 async def run_analysis(
     patient_input: PatientInput,
     patient_meta: dict | None = None,
 ) -> None:
     """Run the pipeline with cl.Step visualization and send formatted output."""
     step_durations: list[dict] = []
-    step_start_times: dict[str, float] = {}
-    active_steps: dict[str, cl.Step] = {}
+    # Only one step is ever timed at a time: (name, start) of the last one
+    prev: tuple[str, float] | None = None
 
     async def step_callback(step_name: str, result: Any) -> None:
         """Chainlit step visualization callback — same protocol as real pipeline."""
-        nonlocal step_durations
+        nonlocal prev
 
-        # Close previous steps if open
-        for prev_name, prev_step in list(active_steps.items()):
-            if prev_name in step_start_times:
-                dur = time.monotonic() - step_start_times[prev_name]
-                step_durations.append({"name": prev_name, "duration": round(dur, 1)})
-                del step_start_times[prev_name]
+        # Close the previous step's clock
+        now = time.monotonic()
+        if prev is not None:
+            prev_name, prev_start = prev
+            step_durations.append({"name": prev_name, "duration": round(now - prev_start, 1)})
+            prev = None
 
         if step_name == "Complete":
-            for name, start in list(step_start_times.items()):
-                dur = time.monotonic() - start
-                step_durations.append({"name": name, "duration": round(dur, 1)})
-            step_start_times.clear()
-            active_steps.clear()
             return
 
         # Create a new Chainlit step
         emoji = STEP_EMOJIS.get(step_name, "\u2699\ufe0f")
         step = cl.Step(name=f"{emoji} {step_name}", type="tool")
-        step_start_times[step_name] = time.monotonic()
-        active_steps[step_name] = step
+        prev = (step_name, time.monotonic())
 
         await step.__aenter__()
 
@@ -288,10 +382,7 @@ async def run_analysis(
             detail = result.get("detail", "")
             step.output = detail or json.dumps(result, indent=2, default=str)
         elif isinstance(result, list):
-            step.output = json.dumps(
-                [r.model_dump() if hasattr(r, "model_dump") else str(r) for r in result],
-                indent=2, default=str,
-            )
+            step.output = _preview_list(result)
         else:
             step.output = str(result) if result else "Done"
 
@@ -302,39 +393,22 @@ async def run_analysis(
         output = await run_pipeline(
             patient_input=patient_input,
             data=DATA,
-            session_mgr=SESSION_MGR,
+            session_mgr=_session_mgr(),
             step_callback=step_callback,
         )
 
         # Build the complete HTML card output
-        hpo_index = DATA.get("hpo_index", {})
         html_content = format_agent_output(
             output=output,
             patient_meta=patient_meta,
-            hpo_index=hpo_index,
+            hpo_labels=HPO_LABELS,
             step_durations=step_durations,
         )
 
-        # Build action buttons for missing phenotypes (assess chips)
-        assess_actions = []
-        seen_labels: set[str] = set()
-        for dc in output.disease_candidates[:3]:
-            for term_id in dc.missing_terms:
-                label = _resolve_label(hpo_index, term_id)
-                if label.lower() not in seen_labels:
-                    seen_labels.add(label.lower())
-                    assess_actions.append(
-                        cl.Action(
-                            name="add_hpo_term",
-                            payload={"hpo_id": term_id, "label": label},
-                            label=f"+ {label}",
-                        )
-                    )
-
         # Send the single output message with all HTML cards
         await cl.Message(
             content=html_content,
-            actions=assess_actions[:8],  # Cap at 8 action buttons
+            actions=_build_assess_actions(output.disease_candidates[:3], HPO_LABELS),
         ).send()
 
     except Exception as e:
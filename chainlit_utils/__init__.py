@@ -1,20 +1,36 @@
 """
 chainlit_utils — UI helpers for the Diagnostic Copilot Chainlit frontend.
 
-Re-exports the public API:
+Re-exports the public API (resolved lazily on first access, PEP 562, so
+importing the package doesn't pull in the formatter module):
     - format_agent_output   (HTML card builder)
     - format_welcome_card   (branded welcome dashboard)
     - format_patient_load_card  (patient echo card)
 """
 
-from chainlit_utils.formatters import (
-    format_agent_output,
-    format_welcome_card,
-    format_patient_load_card,
-)
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from chainlit_utils.formatters import (
+        format_agent_output,
+        format_welcome_card,
+        format_patient_load_card,
+    )
 
 __all__ = [
     "format_agent_output",
     "format_welcome_card",
     "format_patient_load_card",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        from chainlit_utils import formatters
+
+        value = getattr(formatters, name)
+        globals()[name] = value  # later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
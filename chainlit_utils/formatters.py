@@ -12,8 +12,9 @@ DifferentialEntry.disease_id → DiseaseCandidate.matched_terms / missing_terms.
 
 from __future__ import annotations
 
-import html
-from typing import Optional
+from html import escape as _html_escape
+from itertools import chain, islice
+from typing import Iterator, Optional
 
 from core.models import AgentOutput
 
@@ -22,19 +23,19 @@ from core.models import AgentOutput
 
 def _esc(text) -> str:
     """HTML-escape any value safely."""
-    return html.escape(str(text)) if text else ""
+    if isinstance(text, str):
+        return _html_escape(text)
+    return _html_escape(str(text)) if text else ""
 
 
-def _resolve_label(hpo_index: dict, hpo_id: str) -> str:
-    """Resolve an HPO ID to its human-readable label."""
-    entry = hpo_index.get(hpo_id)
-    if entry is None:
-        return hpo_id
-    if isinstance(entry, dict):
-        return entry.get("label", hpo_id)
-    return str(entry)
+def _resolve_label(hpo_labels: dict[str, str], hpo_id: str) -> str:
+    """Resolve an HPO ID to its human-readable label (the ID if unknown)."""
+    return hpo_labels.get(hpo_id, hpo_id)
 
 
+# Both maps cover every value of the matching Literal field in core.models
+# (DifferentialEntry.confidence, NextStep.action_type), so renders index
+# them directly.
 CONF_CSS = {"high": "high", "moderate": "mod", "low": "low"}
 
 ACTION_TYPE_LABELS = {
@@ -47,51 +48,102 @@ ACTION_TYPE_LABELS = {
 }
 
 
+# ── Static HTML fragments (identical on every render) ──────────────
+
+_GAUGE_OPEN = (
+    '<div class="gauge-wrap">'
+    '<svg viewBox="0 0 42 42">'
+    '<circle class="gauge-bg" cx="21" cy="21" r="16"/>'
+)
+
+_DA_ROW_TAIL = (
+    '<div class="da-chev">\u25be</div>'
+    '</div>'
+    '<div class="da-body"><div class="da-inner">'
+)
+
+_UNCERT_HEAD = (
+    '<hr class="mid-sep">'
+    '<div class="col-header" style="border-top:none">'
+    '<span style="font-size:12px">\u2753</span>'
+    '<span class="col-title">Uncertainty Summary</span>'
+    '</div>'
+)
+
+_WWC_HEAD = (
+    '<div class="col-header" style="border-top: 1px solid var(--b1)">'
+    '<span style="font-size:12px">\U0001f504</span>'
+    '<span class="col-title">What Would Change This</span>'
+    '</div>'
+)
+
+# Welcome card frame around the patient grid
+_WELCOME_HEAD = (
+    '<div class="screen-input" id="screen-input">'
+    '<div class="input-logo">Diagnostic<em>Copilot</em></div>'
+    '<div class="input-sub">AI-powered rare disease diagnostic reasoning</div>'
+    '<div class="input-card">'
+    '<div class="inp-section-label">Select a test patient</div>'
+    '<div class="patient-grid">'
+)
+
+_WELCOME_TAIL = (
+    '</div>'
+    '<div class="divider">or enter HPO terms manually</div>'
+    '<div class="hpo-input-wrap">'
+    '<textarea class="hpo-input-field" '
+    'placeholder="HP:0001250, HP:0001263, HP:0001252 — or paste a clinical note…">'
+    '</textarea></div>'
+    '<button class="run-btn">\u25b6 &nbsp; Run Diagnostic Pipeline</button>'
+    '</div></div>'
+)
+
+# Placeholder pipeline rows when no step timings were recorded
+_DEFAULT_PIPELINE_ROWS = "".join(
+    f'<div class="pl-row">'
+    f'<div class="pl-node done">\u2713</div>'
+    f'<div class="pl-label done">{name}</div>'
+    f'<div class="pl-ms">\u2014</div>'
+    f'</div>'
+    for name in (
+        "Red Flag Check", "HPO Mapping", "Disease Matching",
+        "Clinical Reasoning", "Final Output",
+    )
+)
+
+
 # ═════════════════════════════════════════════════════════════════════
 # SCREEN 1 — WELCOME / INPUT
 # ═════════════════════════════════════════════════════════════════════
 
-def format_welcome_card(patients: list[dict], hpo_index: dict) -> str:
+def format_welcome_card(patients: list[dict], hpo_labels: dict[str, str]) -> str:
     """Build the Screen 1 input card with patient grid + HPO textarea."""
 
     # Patient buttons (up to 6, arranged in 3-col grid)
-    patient_btns = ""
+    patient_btns: list[str] = []
     for i, p in enumerate(patients[:6]):
         pid = _esc(p.get("_id", f"patient_{i+1}"))
         age = p.get("age", "?")
-        sex = str(p.get("sex", "?")).upper()
-        sex_class = "f" if sex.startswith("F") else "m"
+        sex = _esc(str(p.get("sex", "?")).upper())
+        sex_initial = sex[:1]
+        sex_class = "f" if sex_initial == "F" else "m"
         name = _esc(p.get("diagnosis_name", "Unknown"))
         hpo_count = len(p.get("hpo_terms", []))
         short_id = pid[-2:] if len(pid) >= 2 else pid
-        avatar_text = f"{short_id}{sex[0]}"
+        avatar_text = f"{short_id}{sex_initial}"
         sel_cls = " sel" if i == 0 else ""
 
-        patient_btns += (
+        patient_btns.append(
             f'<div class="pt-btn{sel_cls}" data-patient-index="{i}">'
             f'<div class="pt-btn-top">'
-            f'<div class="pt-av {sex_class}">{_esc(avatar_text)}</div>'
-            f'<div class="pt-meta">{age}yo {sex[0]} &middot; {hpo_count} HPO</div>'
+            f'<div class="pt-av {sex_class}">{avatar_text}</div>'
+            f'<div class="pt-meta">{age}yo {sex_initial} &middot; {hpo_count} HPO</div>'
             f'</div>'
             f'<div class="pt-name">{name}</div>'
             f'</div>'
         )
 
-    return (
-        f'<div class="screen-input" id="screen-input">'
-        f'<div class="input-logo">Diagnostic<em>Copilot</em></div>'
-        f'<div class="input-sub">AI-powered rare disease diagnostic reasoning</div>'
-        f'<div class="input-card">'
-        f'<div class="inp-section-label">Select a test patient</div>'
-        f'<div class="patient-grid">{patient_btns}</div>'
-        f'<div class="divider">or enter HPO terms manually</div>'
-        f'<div class="hpo-input-wrap">'
-        f'<textarea class="hpo-input-field" '
-        f'placeholder="HP:0001250, HP:0001263, HP:0001252 — or paste a clinical note…">'
-        f'</textarea></div>'
-        f'<button class="run-btn">\u25b6 &nbsp; Run Diagnostic Pipeline</button>'
-        f'</div></div>'
-    )
+    return f'{_WELCOME_HEAD}{"".join(patient_btns)}{_WELCOME_TAIL}'
 
 
 # ═════════════════════════════════════════════════════════════════════
@@ -101,20 +153,23 @@ def format_welcome_card(patients: list[dict], hpo_index: dict) -> str:
 def format_agent_output(
     output: AgentOutput,
     patient_meta: dict | None = None,
-    hpo_index: dict | None = None,
+    hpo_labels: dict[str, str] | None = None,
     step_durations: list[dict] | None = None,
 ) -> str:
     """Build the complete 3-column dashboard HTML from an AgentOutput."""
-    if hpo_index is None:
-        hpo_index = {}
+    if hpo_labels is None:
+        hpo_labels = {}
     if patient_meta is None:
         patient_meta = {}
+    step_durations = step_durations or []
+    # Read once; the topbar shows the total and the pipeline column each row
+    durations = [sd.get("duration", 0) for sd in step_durations]
 
-    topbar = _build_topbar(output, patient_meta, step_durations)
-    statsbar = _build_statsbar(output, hpo_index)
-    col1 = _build_col_left(output, hpo_index, step_durations)
-    col2 = _build_col_middle(output, hpo_index)
-    col3 = _build_col_right(output, step_durations)
+    topbar = _build_topbar(patient_meta, len(output.patient_hpo_observed), sum(durations))
+    statsbar = _build_statsbar(output, hpo_labels)
+    col1 = _build_col_left(output, hpo_labels, step_durations)
+    col2 = _build_col_middle(output, hpo_labels)
+    col3 = _build_col_right(output, step_durations, durations)
 
     return (
         f'<div class="screen-dash" id="screen-dash">'
@@ -130,17 +185,15 @@ def format_agent_output(
 # ── Topbar ──────────────────────────────────────────────────────────
 
 def _build_topbar(
-    output: AgentOutput,
     patient_meta: dict,
-    step_durations: list[dict] | None,
+    hpo_count: int,
+    total_dur: float,
 ) -> str:
     pid = _esc(patient_meta.get("_id", "??"))
     age = patient_meta.get("age", "?")
     sex = str(patient_meta.get("sex", "?")).upper()
     diag = _esc(patient_meta.get("diagnosis_name", ""))
-    hpo_count = len(output.patient_hpo_observed)
 
-    total_dur = sum(sd.get("duration", 0) for sd in (step_durations or []))
     dur_text = f"{total_dur:.1f}s" if total_dur > 0 else "—"
 
     return (
@@ -162,11 +215,12 @@ def _build_topbar(
 
 # ── Statsbar (5 tiles) ─────────────────────────────────────────────
 
-def _build_statsbar(output: AgentOutput, hpo_index: dict) -> str:
+def _build_statsbar(output: AgentOutput, hpo_labels: dict[str, str]) -> str:
     pct = int(output.data_completeness * 100)
     offset = round(100 - (100 * output.data_completeness))
 
-    hpo_count = len(output.patient_hpo_observed)
+    observed = output.patient_hpo_observed
+    hpo_count = len(observed)
     candidates = len(output.disease_candidates)
     flags = len(output.red_flags)
 
@@ -174,9 +228,7 @@ def _build_statsbar(output: AgentOutput, hpo_index: dict) -> str:
         f'<div class="statsbar">'
         # Tile 1: Completeness gauge
         f'<div class="stat-tile" style="--cc:var(--teal)">'
-        f'<div class="gauge-wrap">'
-        f'<svg viewBox="0 0 42 42">'
-        f'<circle class="gauge-bg" cx="21" cy="21" r="16"/>'
+        f'{_GAUGE_OPEN}'
         f'<circle class="gauge-fill" cx="21" cy="21" r="16" '
         f'style="stroke-dashoffset:{offset}"/>'
         f'</svg>'
@@ -210,7 +262,7 @@ def _build_statsbar(output: AgentOutput, hpo_index: dict) -> str:
             f'<span style="padding:2px 7px;border-radius:4px;font-size:10px;'
             f'font-family:var(--mono);background:var(--blue-a);color:var(--blue);'
             f'border:1px solid rgba(96,165,250,.2)">{_esc(m.hpo_id)}</span>'
-            for m in output.patient_hpo_observed[:8]
+            for m in observed[:8]
         ) +
         f'</div>'
         f'<div class="stat-accent"></div>'
@@ -223,19 +275,22 @@ def _build_statsbar(output: AgentOutput, hpo_index: dict) -> str:
 
 def _build_col_left(
     output: AgentOutput,
-    hpo_index: dict,
+    hpo_labels: dict[str, str],
     step_durations: list[dict] | None,
 ) -> str:
     # Build a lookup from disease_id → DiseaseCandidate for matched/missing tags
-    dc_by_id: dict[str, "DiseaseCandidate"] = {}
-    for dc in output.disease_candidates:
-        dc_by_id[dc.disease_id] = dc
+    candidates = output.disease_candidates
+    differential = output.differential
+    dc_by_id = {dc.disease_id: dc for dc in candidates}
 
     # Build accordion cards from the differential entries
-    diff_cards = ""
-    for i, entry in enumerate(output.differential[:5]):
-        conf_cls = CONF_CSS.get(entry.confidence, "low")
-        dc = dc_by_id.get(entry.disease_id)
+    esc = _esc
+    dc_for = dc_by_id.get
+    label_of = hpo_labels.get
+    diff_cards: list[str] = []
+    for i, entry in enumerate(differential[:5]):
+        conf_cls = CONF_CSS[entry.confidence]
+        dc = dc_for(entry.disease_id)
 
         # Score: use coverage_pct from DiseaseCandidate, or sim_score
         pct = 0
@@ -245,43 +300,40 @@ def _build_col_left(
                 pct = int(dc.sim_score * 100) if dc.sim_score <= 1 else int(dc.sim_score)
 
         # Tags: matched (green) and missing (amber), resolved to labels
-        matched_tags = ""
-        missing_tags = ""
+        tags: list[str] = []
         if dc:
             for tid in dc.matched_terms[:6]:
-                lbl = _esc(_resolve_label(hpo_index, tid))
-                matched_tags += f'<span class="tag s">\u2713 {lbl}</span>'
+                lbl = esc(label_of(tid, tid))
+                tags.append(f'<span class="tag s">\u2713 {lbl}</span>')
             for tid in dc.missing_terms[:4]:
-                lbl = _esc(_resolve_label(hpo_index, tid))
-                missing_tags += f'<span class="tag m">\u26a0 {lbl}</span>'
+                lbl = esc(label_of(tid, tid))
+                tags.append(f'<span class="tag m">\u26a0 {lbl}</span>')
 
         open_cls = " open" if i == 0 else ""
 
-        diff_cards += (
+        diff_cards.append(
             f'<div class="da {conf_cls}{open_cls}">'
             f'<div class="da-row">'
             f'<div class="da-num">{i+1}</div>'
             f'<div>'
-            f'<div class="da-name">{_esc(entry.disease)}</div>'
-            f'<div class="da-id">{_esc(entry.disease_id)}</div>'
+            f'<div class="da-name">{esc(entry.disease)}</div>'
+            f'<div class="da-id">{esc(entry.disease_id)}</div>'
             f'</div>'
-            f'<div class="da-badge">{_esc(entry.confidence)}</div>'
+            f'<div class="da-badge">{entry.confidence}</div>'
             f'<div class="da-score-col">'
             f'<div class="da-pct">{pct}%</div>'
             f'<div class="da-bar"><div class="da-fill" style="width:{pct}%"></div></div>'
             f'</div>'
-            f'<div class="da-chev">\u25be</div>'
-            f'</div>'
-            f'<div class="da-body"><div class="da-inner">'
-            f'<div class="da-reason">{_esc(entry.confidence_reasoning)}</div>'
-            f'<div class="tags">{matched_tags}{missing_tags}</div>'
+            f'{_DA_ROW_TAIL}'
+            f'<div class="da-reason">{esc(entry.confidence_reasoning)}</div>'
+            f'<div class="tags">{"".join(tags)}</div>'
             f'</div></div>'
             f'</div>'
         )
 
-    total_candidates = len(output.disease_candidates)
-    shown = min(5, len(output.differential))
-    assess_html = _build_assess_chips(output, hpo_index)
+    total_candidates = len(candidates)
+    shown = min(5, len(differential))
+    assess_html = _build_assess_chips(output, hpo_labels) if total_candidates else ""
 
     return (
         f'<div class="col">'
@@ -291,32 +343,33 @@ def _build_col_left(
         f'<div class="col-cnt">top {shown} of {total_candidates}</div>'
         f'</div>'
         f'<div class="col-body">'
-        f'<div class="diff-list">{diff_cards}</div>'
+        f'<div class="diff-list">{"".join(diff_cards)}</div>'
         f'{assess_html}'
         f'</div>'
         f'</div>'
     )
 
 
-def _build_assess_chips(output: AgentOutput, hpo_index: dict) -> str:
-    """Render assess/refine chips at the bottom of the differential column."""
+def _unique_missing_terms(candidates) -> Iterator[str]:
+    """Yield each missing term across *candidates* once, in order."""
     seen: set[str] = set()
-    chips = []
-
-    for dc in output.disease_candidates[:3]:
-        for term_id in dc.missing_terms:
-            if term_id in seen:
-                continue
+    for term_id in chain.from_iterable(dc.missing_terms for dc in candidates):
+        if term_id not in seen:
             seen.add(term_id)
-            label = _resolve_label(hpo_index, term_id)
-            chips.append(
-                f'<span class="ac" data-hpo-id="{_esc(term_id)}" '
-                f'data-hpo-label="{_esc(label)}">+ {_esc(label)}</span>'
-            )
-            if len(chips) >= 10:
-                break
-        if len(chips) >= 10:
-            break
+            yield term_id
+
+
+def _build_assess_chips(output: AgentOutput, hpo_labels: dict[str, str]) -> str:
+    """Render assess/refine chips at the bottom of the differential column."""
+    chips = []
+    # Missing terms of the top 3 candidates, first occurrence only, capped
+    top3 = islice(output.disease_candidates, 3)
+    for term_id in islice(_unique_missing_terms(top3), 10):
+        label = _esc(_resolve_label(hpo_labels, term_id))
+        chips.append(
+            f'<span class="ac" data-hpo-id="{_esc(term_id)}" '
+            f'data-hpo-label="{label}">+ {label}</span>'
+        )
 
     if not chips:
         return ""
@@ -331,31 +384,28 @@ def _build_assess_chips(output: AgentOutput, hpo_index: dict) -> str:
 
 # ── Column 2: Next Steps + Uncertainty ─────────────────────────────
 
-def _build_col_middle(output: AgentOutput, hpo_index: dict) -> str:
+def _build_col_middle(output: AgentOutput, hpo_labels: dict[str, str]) -> str:
     # Next steps cards
-    steps_html = ""
-    for i, step in enumerate(output.next_best_steps):
-        urgency = step.urgency
-        type_label = ACTION_TYPE_LABELS.get(step.action_type, step.action_type)
-
-        steps_html += (
-            f'<div class="step-card {urgency}">'
-            f'<div>'
-            f'<div class="sc-type">{_esc(type_label)}</div>'
-            f'<div class="sc-action">{_esc(step.action)}</div>'
-            f'<div class="sc-disc">{_esc(step.rationale)}</div>'
-            f'</div>'
-            f'<div class="sc-n">{step.rank}</div>'
-            f'</div>'
-        )
+    next_steps = output.next_best_steps
+    steps = [
+        f'<div class="step-card {step.urgency}">'
+        f'<div>'
+        f'<div class="sc-type">{ACTION_TYPE_LABELS[step.action_type]}</div>'
+        f'<div class="sc-action">{_esc(step.action)}</div>'
+        f'<div class="sc-disc">{_esc(step.rationale)}</div>'
+        f'</div>'
+        f'<div class="sc-n">{step.rank}</div>'
+        f'</div>'
+        for step in next_steps
+    ]
 
-    step_count = len(output.next_best_steps)
+    step_count = len(next_steps)
 
     # Uncertainty summary (3-column: known / missing / ambiguous)
     uc = output.uncertainty
-    known_items = "".join(f'<div class="uc-item">{_esc(k)}</div>' for k in uc.known)
-    missing_items = "".join(f'<div class="uc-item">{_esc(m)}</div>' for m in uc.missing)
-    amb_items = "".join(f'<div class="uc-item">{_esc(a)}</div>' for a in uc.ambiguous)
+    known_items = _uc_items(uc.known)
+    missing_items = _uc_items(uc.missing)
+    amb_items = _uc_items(uc.ambiguous)
 
     return (
         f'<div class="col">'
@@ -365,12 +415,8 @@ def _build_col_middle(output: AgentOutput, hpo_index: dict) -> str:
         f'<div class="col-cnt">{step_count} actions</div>'
         f'</div>'
         f'<div class="mid-col-body">'
-        f'<div class="steps-list">{steps_html}</div>'
-        f'<hr class="mid-sep">'
-        f'<div class="col-header" style="border-top:none">'
-        f'<span style="font-size:12px">\u2753</span>'
-        f'<span class="col-title">Uncertainty Summary</span>'
-        f'</div>'
+        f'<div class="steps-list">{"".join(steps)}</div>'
+        f'{_UNCERT_HEAD}'
         f'<div class="uncert-wrap">'
         f'<div class="uc-col k"><div class="uc-head">\u2713 Known</div>{known_items}</div>'
         f'<div class="uc-col x"><div class="uc-head">\u2717 Missing</div>{missing_items}</div>'
@@ -381,50 +427,44 @@ def _build_col_middle(output: AgentOutput, hpo_index: dict) -> str:
     )
 
 
+_UC_ITEM_SEP = '</div><div class="uc-item">'
+
+
+def _uc_items(items: list[str]) -> str:
+    """Render one uncertainty column's items as adjacent ``uc-item`` divs."""
+    if not items:
+        return ""
+    return f'<div class="uc-item">{_UC_ITEM_SEP.join(map(_esc, items))}</div>'
+
+
 # ── Column 3: Pipeline + What Would Change ─────────────────────────
 
 def _build_col_right(
     output: AgentOutput,
-    step_durations: list[dict] | None,
+    step_durations: list[dict],
+    durations: list[float],
 ) -> str:
-    # Pipeline rows
-    pipeline_html = ""
-    pipeline_steps = step_durations or []
-    for sd in pipeline_steps:
-        name = _esc(sd.get("name", ""))
-        dur = sd.get("duration", 0)
-        pipeline_html += (
-            f'<div class="pl-row">'
-            f'<div class="pl-node done">\u2713</div>'
-            f'<div class="pl-label done">{name}</div>'
-            f'<div class="pl-ms">{dur:.1f}s</div>'
-            f'</div>'
-        )
-    if not pipeline_html:
-        default_steps = [
-            "Red Flag Check", "HPO Mapping", "Disease Matching",
-            "Clinical Reasoning", "Final Output",
-        ]
-        for name in default_steps:
-            pipeline_html += (
-                f'<div class="pl-row">'
-                f'<div class="pl-node done">\u2713</div>'
-                f'<div class="pl-label done">{_esc(name)}</div>'
-                f'<div class="pl-ms">\u2014</div>'
-                f'</div>'
-            )
+    # Pipeline rows — one structurally identical row per timed step
+    pipeline_rows = [
+        f'<div class="pl-row">'
+        f'<div class="pl-node done">\u2713</div>'
+        f'<div class="pl-label done">{_esc(sd.get("name", ""))}</div>'
+        f'<div class="pl-ms">{dur:.1f}s</div>'
+        f'</div>'
+        for sd, dur in zip(step_durations, durations)
+    ]
+    pipeline_html = "".join(pipeline_rows) or _DEFAULT_PIPELINE_ROWS
 
     pip_status = "complete"
 
     # What would change
-    wwc_html = ""
-    for w in (output.what_would_change or []):
-        wwc_html += (
-            f'<div class="wwc-item">'
-            f'<span class="wwc-dot">\u203a</span>'
-            f'<span class="wwc-text">{_esc(w)}</span>'
-            f'</div>'
-        )
+    wwc_items = [
+        f'<div class="wwc-item">'
+        f'<span class="wwc-dot">\u203a</span>'
+        f'<span class="wwc-text">{_esc(w)}</span>'
+        f'</div>'
+        for w in output.what_would_change or ()
+    ]
 
     return (
         f'<div class="col">'
@@ -435,11 +475,8 @@ def _build_col_right(
         f'</div>'
         f'<div class="col-body">'
         f'<div class="pipeline-list">{pipeline_html}</div>'
-        f'<div class="col-header" style="border-top: 1px solid var(--b1)">'
-        f'<span style="font-size:12px">\U0001f504</span>'
-        f'<span class="col-title">What Would Change This</span>'
-        f'</div>'
-        f'<div class="wwc-list">{wwc_html}</div>'
+        f'{_WWC_HEAD}'
+        f'<div class="wwc-list">{"".join(wwc_items)}</div>'
         f'</div>'
         f'</div>'
     )
@@ -449,27 +486,28 @@ def _build_col_right(
 # PATIENT LOAD ECHO CARD (shown during pipeline run)
 # ═════════════════════════════════════════════════════════════════════
 
-def format_patient_load_card(patient: dict, hpo_index: dict) -> str:
+def format_patient_load_card(patient: dict, hpo_labels: dict[str, str]) -> str:
     """Build a loading card that fills the viewport while pipeline runs."""
     pid = _esc(patient.get("_id", "??"))
     age = patient.get("age", "?")
     sex = _esc(str(patient.get("sex", "?")).upper())
-    sex_class = "f" if sex.startswith("F") else "m"
+    sex_initial = sex[:1]
+    sex_class = "f" if sex_initial == "F" else "m"
     name = _esc(patient.get("diagnosis_name", "Unknown"))
     hpo_terms = patient.get("hpo_terms", [])
     hpo_count = len(hpo_terms)
 
-    avatar_text = f"{pid[-2:]}{sex[0]}" if pid else "??"
+    avatar_text = f"{pid[-2:]}{sex_initial}" if pid else "??"
 
-    chips = ""
+    chips: list[str] = []
     for hid in hpo_terms[:8]:
-        label = _esc(_resolve_label(hpo_index, hid))
-        chips += (
+        label = _esc(_resolve_label(hpo_labels, hid))
+        chips.append(
             f'<span class="hpo-chip">{_esc(hid)}'
             f'<span class="hpo-chip-label">{label}</span></span>'
         )
     if hpo_count > 8:
-        chips += f'<span class="hpo-chip">+{hpo_count - 8} more</span>'
+        chips.append(f'<span class="hpo-chip">+{hpo_count - 8} more</span>')
 
     return (
         f'<div class="patient-load-card">'
@@ -478,12 +516,12 @@ def format_patient_load_card(patient: dict, hpo_index: dict) -> str:
         f'<div class="pl-top">'
         f'<div class="card-patient-avatar {sex_class}" '
         f'style="width:38px;height:38px;font-size:12px;border-radius:8px;">'
-        f'{_esc(avatar_text)}</div>'
+        f'{avatar_text}</div>'
         f'<div>'
         f'<div class="pl-action">Running diagnostic pipeline\u2026</div>'
         f'<div class="cp-name">Patient {pid} — {age}yo {sex}</div>'
         f'<div class="cp-sub">{name} &middot; {hpo_count} HPO terms</div>'
         f'</div></div>'
-        f'<div class="cp-chips" style="margin-top:8px;">{chips}</div>'
+        f'<div class="cp-chips" style="margin-top:8px;">{"".join(chips)}</div>'
         f'</div></div>'
     )
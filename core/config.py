@@ -21,3 +21,8 @@ AZURE_ENDPOINT: str = os.getenv("AZURE_ENDPOINT", "")       # e.g. https://<reso
 AZURE_API_KEY: str = os.getenv("AZURE_API_KEY", "")
 AZURE_DEPLOYMENT: str = os.getenv("AZURE_DEPLOYMENT", "")   # deployment / model name
 AZURE_API_VERSION: str = os.getenv("AZURE_API_VERSION", "2024-12-01-preview")
+LLM_RPM: float = float(os.getenv("LLM_RPM", "60"))          # starting request rate; adapts on 429s
+
+# LLM response cache (opt-in; useful for eval replays — never enable in production)
+LLM_CACHE: bool = os.getenv("LLM_CACHE", "") == "1"
+LLM_CACHE_DIR: str = os.getenv("LLM_CACHE_DIR", "~/.cache/hackrare2026/llm")
@@ -10,97 +10,160 @@ that tools need to operate without further DB queries.
 from __future__ import annotations
 
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from pathlib import Path
 
 import pronto
 
+import hpo_functions
+
 # Resolve project root relative to this file's location
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent
-
-
-def load_all(db) -> dict[str, Any]:
-    """
-    Load all reference data from MongoDB into memory.
-
-    Parameters
-    ----------
-    db : pymongo.database.Database
-        The MongoDB database handle (from ``core.database.get_db()``).
-
-    Returns
-    -------
-    dict with keys:
-        - ``"hpo_index"``        : dict  — HPO ID → document
-        - ``"synonym_index"``    : dict  — lowercase synonym → HPO ID
-        - ``"ic_scores"``        : dict  — HPO ID → information-content float
-        - ``"disease_to_hpo"``   : dict  — disease ID → set of HPO IDs
-        - ``"disease_ancestors"`` : dict  — disease ID → set of ancestor HPO IDs
-        - ``"disease_to_name"``  : dict  — disease ID → human-readable name
-        - ``"orphanet_profiles"`` : dict  — disease ID → Orphanet sub-document
-        - ``"patients"``         : list  — sample patient documents
-        - ``"ontology"``         : pronto.Ontology — parsed hp.obo
-    """
-    t0 = time.time()
-    data: dict[str, Any] = {}
-
-    # --- HPO terms -----------------------------------------------------------
+_OBO_PATH = _PROJECT_ROOT / "data" / "raw" / "hp.obo"
+# Precomputed superclass index (scripts/build_hpo_cache.py)
+ANCESTOR_INDEX_PATH = _PROJECT_ROOT / "data" / "processed" / "hp_ancestors.npz"
+
+# Only the fields the in-memory indexes (and hpo_lookup) read; the rest of
+# each document stays on the server.
+_HPO_TERM_FIELDS = {
+    "label": 1, "definition": 1, "parents": 1, "synonyms": 1, "ic_score": 1,
+}
+_DISEASE_FIELDS = {"hpo_terms": 1, "ancestor_terms": 1, "name": 1, "orphanet": 1}
+# Documents per cursor round-trip (the server default is 101 for the first)
+_SCAN_BATCH_SIZE = 5000
+
+
+def _load_hpo_terms(db) -> dict[str, Any]:
+    """Scan ``hpo_terms`` into the ID, label, synonym and IC indexes."""
     print("Loading HPO terms...")
     hpo_index: dict[str, dict] = {}
+    hpo_labels: dict[str, str] = {}
     synonym_index: dict[str, str] = {}
     ic_scores: dict[str, float] = {}
 
-    for doc in db["hpo_terms"].find():
+    for doc in db["hpo_terms"].find({}, _HPO_TERM_FIELDS).batch_size(_SCAN_BATCH_SIZE):
         hpo_id = doc["_id"]
         hpo_index[hpo_id] = doc
 
         # Build synonym index: label + synonyms → hpo_id
         label = doc.get("label", "")
-        if label:
-            synonym_index[label.lower()] = hpo_id
-        for syn in doc.get("synonyms", []):
-            if syn:
-                synonym_index[syn.lower()] = hpo_id
+        hpo_labels[hpo_id] = label or hpo_id
+        synonym_index.update(
+            (syn.lower(), hpo_id) for syn in (label, *doc.get("synonyms", [])) if syn
+        )
 
         # IC scores (default null → 0.0 so downstream sums don't crash)
         ic_scores[hpo_id] = float(doc.get("ic_score") or 0.0)
 
-    data["hpo_index"] = hpo_index
-    data["synonym_index"] = synonym_index
-    data["ic_scores"] = ic_scores
     print(f"  -> {len(hpo_index)} HPO terms, {len(synonym_index)} synonym entries, "
           f"{len(ic_scores)} IC scores")
+    return {
+        "hpo_index": hpo_index,
+        "hpo_labels": hpo_labels,
+        "synonym_index": synonym_index,
+        "ic_scores": ic_scores,
+    }
+
 
-    # --- Disease profiles ----------------------------------------------------
+def _load_diseases(db) -> dict[str, Any]:
+    """Scan ``disease_profiles`` into the per-disease lookup tables."""
     print("Loading disease profiles...")
-    disease_to_hpo: dict[str, set[str]] = {}
-    disease_ancestors: dict[str, set[str]] = {}
+    disease_to_hpo: dict[str, frozenset[str]] = {}
+    disease_ancestors: dict[str, frozenset[str]] = {}
     disease_to_name: dict[str, str] = {}
     orphanet_profiles: dict[str, dict | None] = {}
+    # Subtypes often share identical term/ancestor sets; keep one copy each
+    interned: dict[frozenset[str], frozenset[str]] = {}
 
-    for doc in db["disease_profiles"].find():
+    for doc in db["disease_profiles"].find({}, _DISEASE_FIELDS).batch_size(_SCAN_BATCH_SIZE):
         did = doc["_id"]
-        disease_to_hpo[did] = set(doc.get("hpo_terms", []))
-        disease_ancestors[did] = set(doc.get("ancestor_terms", []))
+        terms = frozenset(doc.get("hpo_terms", []))
+        ancestors = frozenset(doc.get("ancestor_terms", []))
+        disease_to_hpo[did] = interned.setdefault(terms, terms)
+        disease_ancestors[did] = interned.setdefault(ancestors, ancestors)
         disease_to_name[did] = doc.get("name", "")
         orphanet_profiles[did] = doc.get("orphanet")
 
-    data["disease_to_hpo"] = disease_to_hpo
-    data["disease_ancestors"] = disease_ancestors
-    data["disease_to_name"] = disease_to_name
-    data["orphanet_profiles"] = orphanet_profiles
     print(f"  -> {len(disease_to_hpo)} diseases loaded")
+    return {
+        "disease_to_hpo": disease_to_hpo,
+        "disease_ancestors": disease_ancestors,
+        "disease_to_name": disease_to_name,
+        "orphanet_profiles": orphanet_profiles,
+    }
 
-    # --- Patients ------------------------------------------------------------
+
+def _load_patients(db) -> dict[str, Any]:
     print("Loading patients...")
     patients = list(db["patients"].find())
-    data["patients"] = patients
     print(f"  -> {len(patients)} patients loaded")
+    return {"patients": patients}
+
+
+def _ancestor_index_is_fresh() -> bool:
+    if not ANCESTOR_INDEX_PATH.exists():
+        return False
+    return not _OBO_PATH.exists() or ANCESTOR_INDEX_PATH.stat().st_mtime >= _OBO_PATH.stat().st_mtime
+
+
+def _load_ontology() -> dict[str, Any]:
+    # The tools only need superclass lookups; the precomputed index loads in
+    # milliseconds, so hp.obo is parsed only when it is missing or stale.
+    if _ancestor_index_is_fresh():
+        print(f"Loading HPO ancestor index from {ANCESTOR_INDEX_PATH.name}...")
+        ontology = hpo_functions.AncestorIndex.load(ANCESTOR_INDEX_PATH)
+        print(f"  -> {len(ontology.term_ids)} terms loaded")
+        return {"ontology": ontology}
 
-    # --- Ontology ------------------------------------------------------------
     print("Loading HPO ontology from data/raw/hp.obo (this takes ~5s)...")
-    data["ontology"] = pronto.Ontology(str(_PROJECT_ROOT / "data" / "raw" / "hp.obo"))
+    ontology = pronto.Ontology(str(_OBO_PATH))
     print("  -> Ontology loaded")
+    return {"ontology": ontology}
+
+
+def load_all(db) -> dict[str, Any]:
+    """
+    Load all reference data from MongoDB into memory.
+
+    The three collection scans and the hp.obo parse are independent, so
+    they run concurrently; wall time is that of the slowest stage.
+
+    Parameters
+    ----------
+    db : pymongo.database.Database
+        The MongoDB database handle (from ``core.database.get_db()``).
+
+    Returns
+    -------
+    dict with keys:
+        - ``"hpo_index"``        : dict  — HPO ID → document
+        - ``"hpo_labels"``       : dict  — HPO ID → label (ID if unlabelled)
+        - ``"synonym_index"``    : dict  — lowercase synonym → HPO ID
+        - ``"ic_scores"``        : dict  — HPO ID → information-content float
+        - ``"disease_to_hpo"``   : dict  — disease ID → frozenset of HPO IDs
+        - ``"disease_ancestors"`` : dict  — disease ID → frozenset of ancestor HPO IDs
+        - ``"disease_to_name"``  : dict  — disease ID → human-readable name
+        - ``"orphanet_profiles"`` : dict  — disease ID → Orphanet sub-document
+        - ``"patients"``         : list  — sample patient documents
+        - ``"ontology"``         : hpo_functions.AncestorIndex (or pronto.Ontology
+          when the index is missing or older than hp.obo)
+
+    Treat the disease and IC dicts as read-only: ``disease_match`` caches a
+    matrix built from them, keyed on object identity.
+    """
+    t0 = time.time()
+    data: dict[str, Any] = {}
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="load_all") as pool:
+        futures = [
+            pool.submit(_load_ontology),
+            pool.submit(_load_hpo_terms, db),
+            pool.submit(_load_diseases, db),
+            pool.submit(_load_patients, db),
+        ]
+        for future in futures:
+            data.update(future.result())
 
     elapsed = time.time() - t0
     print(f"load_all() completed in {elapsed:.1f}s")
@@ -13,6 +13,10 @@ from core.config import MONGODB_URI, DB_NAME
 
 _client: MongoClient | None = None
 
+# Wire compression for the large load_all / ingest transfers. The server
+# picks the first it also supports; zlib is the stdlib fallback.
+_COMPRESSORS = "zstd,zlib"
+
 
 def get_client() -> MongoClient:
     """Return (and cache) a MongoClient singleton."""
@@ -20,7 +24,7 @@ def get_client() -> MongoClient:
     if _client is None:
         if not MONGODB_URI:
             raise RuntimeError("MONGODB_URI is not set in .env")
-        _client = MongoClient(MONGODB_URI)
+        _client = MongoClient(MONGODB_URI, compressors=_COMPRESSORS)
     return _client
 
 
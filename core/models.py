@@ -6,14 +6,25 @@ Every workstream imports from here. No workstream defines its own models.
 from __future__ import annotations
 
 from typing import Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.dataclasses import dataclass
+
+
+class _FrozenModel(BaseModel):
+    """Immutable base: models are built once per run and never mutated, so
+    trusted internal code may use ``model_construct`` to skip validation.
+
+    Validators are built lazily (``defer_build``) so importing this module
+    stays cheap; the app builds them all at warm-up via :func:`build_models`.
+    """
+    model_config = ConfigDict(frozen=True, extra="ignore", defer_build=True)
 
 
 # ---------------------------------------------------------------------------
 # HPO Lookup Tool output
 # ---------------------------------------------------------------------------
 
-class HPOMatch(BaseModel):
+class HPOMatch(_FrozenModel):
     """Output of HPO Lookup Tool."""
     hpo_id: str                                          # e.g. "HP:0001250"
     label: str                                           # e.g. "Seizures"
@@ -28,7 +39,7 @@ class HPOMatch(BaseModel):
 # Disease Match Tool output
 # ---------------------------------------------------------------------------
 
-class DiseaseCandidate(BaseModel):
+class DiseaseCandidate(_FrozenModel):
     """Output of Disease Match Tool."""
     rank: int
     disease_id: str
@@ -45,7 +56,7 @@ class DiseaseCandidate(BaseModel):
 # Red Flag Detector output
 # ---------------------------------------------------------------------------
 
-class RedFlag(BaseModel):
+class RedFlag(_FrozenModel):
     """Output of Red Flag Detector."""
     flag_label: str
     severity: Literal["URGENT", "WARNING", "WATCH"]
@@ -57,7 +68,7 @@ class RedFlag(BaseModel):
 # Excluded Phenotype Extractor output
 # ---------------------------------------------------------------------------
 
-class ExcludedFinding(BaseModel):
+class ExcludedFinding(_FrozenModel):
     """Output of Excluded Phenotype Extractor."""
     raw_text: str                                        # negation phrase from the note
     mapped_hpo_term: Optional[str] = None
@@ -70,7 +81,7 @@ class ExcludedFinding(BaseModel):
 # Onset & Timing Extractor output
 # ---------------------------------------------------------------------------
 
-class TimingProfile(BaseModel):
+class TimingProfile(_FrozenModel):
     """Output of Onset & Timing Extractor."""
     phenotype_ref: str
     phenotype_label: Optional[str] = None
@@ -88,7 +99,10 @@ class TimingProfile(BaseModel):
 # Phenotype frequency sub-model (for disease profiles)
 # ---------------------------------------------------------------------------
 
-class PhenotypeFrequency(BaseModel):
+# Profiles carry dozens of these each, so it is a slotted dataclass: no
+# per-instance __dict__.  Only ever used nested in DiseaseProfile.
+@dataclass(frozen=True, slots=True)
+class PhenotypeFrequency:
     """Sub-model for disease profiles."""
     hpo_id: str
     label: str
@@ -99,7 +113,7 @@ class PhenotypeFrequency(BaseModel):
 # Orphanet / OMIM Fetch output
 # ---------------------------------------------------------------------------
 
-class DiseaseProfile(BaseModel):
+class DiseaseProfile(_FrozenModel):
     """Output of Orphanet/OMIM Fetch."""
     disease_id: str
     disease_name: str
@@ -113,14 +127,14 @@ class DiseaseProfile(BaseModel):
 # Reanalysis models
 # ---------------------------------------------------------------------------
 
-class ReanalysisReason(BaseModel):
+class ReanalysisReason(_FrozenModel):
     """Sub-model for reanalysis trigger."""
     reason_type: str
     detail: str
     source: str
 
 
-class ReanalysisResult(BaseModel):
+class ReanalysisResult(_FrozenModel):
     """Output of Reanalysis Trigger."""
     score: float                                         # 0 to 1
     recommendation: str
@@ -131,7 +145,7 @@ class ReanalysisResult(BaseModel):
 # Tool call logging
 # ---------------------------------------------------------------------------
 
-class ToolCallRecord(BaseModel):
+class ToolCallRecord(_FrozenModel):
     """For logging tool invocations."""
     tool_name: str
     input_data: dict
@@ -144,7 +158,7 @@ class ToolCallRecord(BaseModel):
 # Pipeline input
 # ---------------------------------------------------------------------------
 
-class PatientInput(BaseModel):
+class PatientInput(_FrozenModel):
     """Input to the diagnostic pipeline."""
     free_text: Optional[str] = None
     hpo_terms: list[str] = Field(default_factory=list)
@@ -158,7 +172,7 @@ class PatientInput(BaseModel):
 # Final output sub-models
 # ---------------------------------------------------------------------------
 
-class NextStep(BaseModel):
+class NextStep(_FrozenModel):
     """Part of final output — recommended next actions."""
     rank: int
     action_type: Literal[
@@ -174,7 +188,7 @@ class NextStep(BaseModel):
     urgency: Literal["urgent", "routine", "low"]
 
 
-class DifferentialEntry(BaseModel):
+class DifferentialEntry(_FrozenModel):
     """Part of final output — LLM confidence assessment for a disease candidate.
 
     Raw phenotype evidence (matched_terms, missing_terms, coverage, genes,
@@ -187,7 +201,7 @@ class DifferentialEntry(BaseModel):
     confidence_reasoning: str
 
 
-class UncertaintySummary(BaseModel):
+class UncertaintySummary(_FrozenModel):
     """Part of final output — what is known, missing, and ambiguous."""
     known: list[str] = Field(default_factory=list)
     missing: list[str] = Field(default_factory=list)
@@ -198,7 +212,7 @@ class UncertaintySummary(BaseModel):
 # Complete pipeline output
 # ---------------------------------------------------------------------------
 
-class AgentOutput(BaseModel):
+class AgentOutput(_FrozenModel):
     """The complete pipeline output — assembled by the orchestrator."""
     session_id: str = ""
     patient_hpo_observed: list[HPOMatch] = Field(default_factory=list)
@@ -213,3 +227,13 @@ class AgentOutput(BaseModel):
     reanalysis: Optional[ReanalysisResult] = None
     what_would_change: list[str] = Field(default_factory=list)
     uncertainty: UncertaintySummary = Field(default_factory=UncertaintySummary)
+
+
+# ---------------------------------------------------------------------------
+# Warm-up
+# ---------------------------------------------------------------------------
+
+def build_models() -> None:
+    """Build every model's validator and serializer now instead of on first use."""
+    for model in _FrozenModel.__subclasses__():
+        model.model_rebuild()
@@ -9,31 +9,62 @@ and final output caching.
 
 from __future__ import annotations
 
-import json
 import logging
 from datetime import datetime, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+import orjson
 import redis
+import zstandard
+from pydantic import BaseModel
+from redis.client import NEVER_DECODE
+
+if TYPE_CHECKING:
+    from core.models import AgentOutput
 
 logger = logging.getLogger(__name__)
 
+# Final outputs at least this large are stored zstd-compressed; smaller ones
+# stay plain JSON.  Readers tell them apart by the zstd frame magic.
+_COMPRESS_MIN_BYTES = 1024
+_ZSTD_LEVEL = 3
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _encode(obj: Any) -> bytes:
+    """Serialise *obj* to JSON bytes (non-JSON values fall back to str)."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _dumps(obj: Any) -> str:
+    return _encode(obj).decode()
+
 
 class SessionManager:
     """Thin wrapper around Redis for per-session state."""
 
     TTL: int = 3600  # 1 hour
+    MAX_CONNECTIONS: int = 64  # shared by all concurrent sessions
 
     def __init__(self, redis_url: str) -> None:
         """
-        Connect to Redis.
+        Connect to Redis over RESP3 through a bounded connection pool.
+
+        Replies are parsed by hiredis when it is installed.  Create one
+        instance per process so every session shares the pool.
 
         Parameters
         ----------
         redis_url : str
             Full Redis connection string (e.g. ``redis://default:pw@host:port``).
         """
-        self._r = redis.from_url(redis_url, decode_responses=True)
+        pool = redis.ConnectionPool.from_url(
+            redis_url,
+            max_connections=self.MAX_CONNECTIONS,
+            decode_responses=True,
+            protocol=3,
+        )
+        self._r = redis.Redis(connection_pool=pool)
 
     # ------------------------------------------------------------------
     # Session lifecycle
@@ -43,7 +74,7 @@ class SessionManager:
         """Create a new session entry with the original user input."""
         key = f"session:{session_id}:input"
         try:
-            self._r.set(key, json.dumps(raw_input), ex=self.TTL)
+            self._r.set(key, _dumps(raw_input), ex=self.TTL)
         except Exception as exc:
             logger.error("Redis create_session failed: %s", exc)
 
@@ -59,25 +90,41 @@ class SessionManager:
         output_data: dict,
     ) -> None:
         """Append a tool-call record to the session's log list."""
+        self.log_tool_calls_batch(
+            session_id,
+            [{"tool_name": tool_name, "input_data": input_data, "output_data": output_data}],
+        )
+
+    def log_tool_calls_batch(self, session_id: str, records: list[dict]) -> None:
+        """
+        Append several tool-call records in one Redis round-trip.
+
+        Parameters
+        ----------
+        session_id : str
+            Session whose log list receives the records.
+        records : list[dict]
+            Each with ``tool_name``, ``input_data`` and ``output_data`` keys;
+            a shared ``timestamp`` is added to every record.
+        """
+        if not records:
+            return
         key = f"session:{session_id}:tools"
-        record = {
-            "tool_name": tool_name,
-            "input_data": input_data,
-            "output_data": output_data,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        }
+        timestamp = datetime.now(timezone.utc).isoformat()
         try:
-            self._r.rpush(key, json.dumps(record, default=str))
-            self._r.expire(key, self.TTL)
+            pipe = self._r.pipeline(transaction=False)
+            pipe.rpush(key, *(_dumps({**rec, "timestamp": timestamp}) for rec in records))
+            pipe.expire(key, self.TTL)
+            pipe.execute()
         except Exception as exc:
-            logger.error("Redis log_tool_call failed: %s", exc)
+            logger.error("Redis log_tool_calls_batch failed: %s", exc)
 
     def get_tool_log(self, session_id: str) -> list[dict]:
         """Return every tool-call record for the session in order."""
         key = f"session:{session_id}:tools"
         try:
             raw_list = self._r.lrange(key, 0, -1)
-            return [json.loads(item) for item in raw_list]
+            return [orjson.loads(item) for item in raw_list]
         except Exception as exc:
             logger.error("Redis get_tool_log failed: %s", exc)
             return []
@@ -87,19 +134,48 @@ class SessionManager:
     # ------------------------------------------------------------------
 
     def set_context(self, session_id: str, context: dict) -> None:
-        """Store / overwrite the running pipeline context."""
+        """Store / overwrite the running pipeline context.
+
+        The context is a Redis hash with one JSON-encoded field per
+        top-level key, so single fields can later be rewritten with
+        :meth:`update_context_field`.
+        """
         key = f"session:{session_id}:context"
         try:
-            self._r.set(key, json.dumps(context, default=str), ex=self.TTL)
+            mapping = {field: _dumps(value) for field, value in context.items()}
+            pipe = self._r.pipeline()  # MULTI: readers never see a half-written hash
+            pipe.delete(key)
+            if mapping:
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.TTL)
+            pipe.execute()
         except Exception as exc:
             logger.error("Redis set_context failed: %s", exc)
 
+    def update_context_field(self, session_id: str, field: str, value: Any) -> None:
+        """Overwrite one top-level field of the stored context.
+
+        Does nothing if the session has no context (never set, or expired),
+        so a lone field never becomes a partial context.
+        """
+        key = f"session:{session_id}:context"
+        try:
+            if not self._r.exists(key):
+                logger.warning("update_context_field: no context for session %s", session_id)
+                return
+            pipe = self._r.pipeline(transaction=False)
+            pipe.hset(key, field, _dumps(value))
+            pipe.expire(key, self.TTL)
+            pipe.execute()
+        except Exception as exc:
+            logger.error("Redis update_context_field failed: %s", exc)
+
     def get_context(self, session_id: str) -> dict | None:
         """Retrieve the running pipeline context, or ``None``."""
         key = f"session:{session_id}:context"
         try:
-            raw = self._r.get(key)
-            return json.loads(raw) if raw else None
+            raw = self._r.hgetall(key)
+            return {field: orjson.loads(value) for field, value in raw.items()} if raw else None
         except Exception as exc:
             logger.error("Redis get_context failed: %s", exc)
             return None
@@ -108,10 +184,36 @@ class SessionManager:
     # Final output
     # ------------------------------------------------------------------
 
-    def set_output(self, session_id: str, output: dict) -> None:
-        """Cache the final AgentOutput (serialised as dict)."""
+    def set_output(self, session_id: str, output: AgentOutput | dict) -> None:
+        """Cache the final AgentOutput.
+
+        A model is serialised straight to JSON by pydantic-core (every field,
+        ``None`` ones as ``null``); a plain dict is still accepted.  Payloads
+        of ``_COMPRESS_MIN_BYTES`` or more are zstd-compressed.
+        """
         key = f"session:{session_id}:output"
         try:
-            self._r.set(key, json.dumps(output, default=str), ex=self.TTL)
+            if isinstance(output, BaseModel):
+                payload = output.model_dump_json().encode()
+            else:
+                payload = _encode(output)
+            if len(payload) >= _COMPRESS_MIN_BYTES:
+                payload = zstandard.compress(payload, _ZSTD_LEVEL)
+            self._r.set(key, payload, ex=self.TTL)
         except Exception as exc:
             logger.error("Redis set_output failed: %s", exc)
+
+    def get_output(self, session_id: str) -> dict | None:
+        """Retrieve the cached final output, or ``None``."""
+        key = f"session:{session_id}:output"
+        try:
+            # Raw bytes: a compressed payload is not valid UTF-8
+            raw = self._r.execute_command("GET", key, **{NEVER_DECODE: True})
+            if not raw:
+                return None
+            if raw[:4] == _ZSTD_MAGIC:
+                raw = zstandard.decompress(raw)
+            return orjson.loads(raw)
+        except Exception as exc:
+            logger.error("Redis get_output failed: %s", exc)
+            return None
@@ -25,5 +25,34 @@ def load_gold_cases(db) -> list[dict]:
         - ``"patient_input"`` : dict matching PatientInput schema
         - ``"expected_disease_ids"`` : list[str]
         - ``"expected_hpo_ids"`` : list[str]
+
+        Documents stored in the WS4 curation layout (``hpo_terms``,
+        ``synthetic_note``, ``gold_diagnosis``) are mapped to these keys;
+        every other stored field (``difficulty`` etc.) is kept as-is.
+
+    Raises
+    ------
+    RuntimeError
+        If the collection holds no gold cases.
     """
-    raise NotImplementedError("WS4: implement gold-case loader from MongoDB")
+    cases = [_as_case(doc) for doc in db["eval_gold_cases"].find()]
+    if not cases:
+        raise RuntimeError(
+            "No gold cases in the eval_gold_cases collection — insert them "
+            "before running the evaluation."
+        )
+    return cases
+
+
+def _as_case(doc: dict) -> dict:
+    """Fill in the scoring keys from a curated gold-case document."""
+    case = dict(doc)
+    hpo_terms = doc.get("hpo_terms", [])
+    case.setdefault("patient_input", {
+        "free_text": doc.get("synthetic_note"),
+        "hpo_terms": hpo_terms,
+    })
+    gold = doc.get("gold_diagnosis")
+    case.setdefault("expected_disease_ids", [gold] if gold else [])
+    case.setdefault("expected_hpo_ids", hpo_terms)
+    return case
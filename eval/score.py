@@ -8,7 +8,25 @@ Computes metrics like top-k accuracy, phenotype recall, etc.
 
 from __future__ import annotations
 
-from core.models import AgentOutput
+import asyncio
+import logging
+from statistics import fmean
+
+from agent.pipeline import run_pipeline
+from core.models import AgentOutput, PatientInput
+from eval.gold_cases import load_gold_cases
+
+logger = logging.getLogger(__name__)
+
+# Gold cases run through the pipeline at most this many at a time; the
+# upstream LLM provider's rate limit is the real ceiling.
+EVAL_CONCURRENCY = 32
+
+# Cut-offs reported as ``top{k}_hit``
+_TOP_K = (1, 3, 5, 10)
+_NOT_RANKED = float("inf")  # rank of an expected disease missing from the differential
+# Keys of score_case's result that _aggregate averages
+_METRICS = (*(f"top{k}_hit" for k in _TOP_K), "hpo_recall")
 
 
 def score_case(output: AgentOutput, expected: dict) -> dict:
@@ -29,13 +47,98 @@ def score_case(output: AgentOutput, expected: dict) -> dict:
         Metric names → values (e.g. ``{"top1_hit": True, "top5_hit": True,
         "hpo_recall": 0.85, ...}``).
     """
-    raise NotImplementedError("WS4: implement single-case scoring")
+    # Rank of each differential entry, looked up once per expected disease
+    diff_rank = {}
+    for rank, entry in enumerate(output.differential):
+        diff_rank.setdefault(entry.disease_id, rank)
+    best_rank = min(
+        (diff_rank.get(did, _NOT_RANKED) for did in expected.get("expected_disease_ids", [])),
+        default=_NOT_RANKED,
+    )
+
+    observed = frozenset(m.hpo_id for m in output.patient_hpo_observed)
+    expected_hpo = frozenset(expected.get("expected_hpo_ids", []))
+
+    return {
+        **{f"top{k}_hit": best_rank < k for k in _TOP_K},
+        "hpo_recall": len(observed & expected_hpo) / max(1, len(expected_hpo)),
+    }
+
+
+async def _score_one(
+    sem: asyncio.Semaphore, case: dict, data: dict, session_mgr
+) -> dict:
+    """Run the pipeline on one gold case (bounded by *sem*) and score it.
+
+    A failing case is logged and returned as ``{"case_id", "error"}`` so the
+    rest of the run carries on.
+    """
+    case_id = case.get("_id")
+    try:
+        async with sem:
+            output = await run_pipeline(PatientInput(**case["patient_input"]), data, session_mgr)
+        return {"case_id": case_id, **score_case(output, case)}
+    except Exception as exc:
+        logger.exception("Gold case %s failed", case_id)
+        return {"case_id": case_id, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def _aggregate(per_case: list[dict]) -> dict:
+    """Average each of ``_METRICS`` across the scored cases.
+
+    Failed cases (those with an ``"error"``) are counted but left out of
+    the averages; other per-case fields such as ``case_id`` are not metrics.
+    """
+    scored = [result for result in per_case if "error" not in result]
+    metrics: dict[str, float] = {}
+    for name in _METRICS:
+        values = [result[name] for result in scored if name in result]
+        if values:
+            metrics[name] = fmean(values)
+    return {
+        "n_cases": len(per_case),
+        "n_failed": len(per_case) - len(scored),
+        "metrics": metrics,
+        "per_case": per_case,
+    }
+
+
+async def run_eval_async(
+    db, data: dict, session_mgr, concurrency: int = EVAL_CONCURRENCY
+) -> dict:
+    """
+    Run full evaluation suite with up to *concurrency* gold cases in flight.
+
+    Parameters
+    ----------
+    db : pymongo.database.Database
+    data : dict
+        Reference-data dict from ``load_all()``.
+    session_mgr : SessionManager
+    concurrency : int
+        Maximum number of pipeline runs at once.
+
+    Returns
+    -------
+    dict
+        ``"n_cases"``, ``"n_failed"``, ``"metrics"`` (mean of each metric
+        across the scored cases) and ``"per_case"`` (each case's
+        ``score_case`` result or error, in load order).
+    """
+    sem = asyncio.Semaphore(concurrency)
+    cases = load_gold_cases(db)
+    per_case = await asyncio.gather(
+        *(_score_one(sem, case, data, session_mgr) for case in cases)
+    )
+    return _aggregate(list(per_case))
 
 
 def run_eval(db, data: dict, session_mgr) -> dict:
     """
     Run full evaluation suite: load gold cases, run pipeline on each, aggregate scores.
 
+    Synchronous entry point for :func:`run_eval_async`.
+
     Parameters
     ----------
     db : pymongo.database.Database
@@ -48,4 +151,4 @@ def run_eval(db, data: dict, session_mgr) -> dict:
     dict
         Aggregated metrics across all gold cases.
     """
-    raise NotImplementedError("WS4: implement batch evaluation harness")
+    return asyncio.run(run_eval_async(db, data, session_mgr))
@@ -15,12 +15,17 @@ Usage:
 
 Dependencies:
     - Python 3.x
-    - Required libraries: pronto, math
+    - Required libraries: pronto, math, numpy
 ===============================================================================
 """
 
 import pronto
 import math
+import weakref
+from collections import Counter
+from itertools import chain
+
+import numpy as np
 
 
 def load_ontology(path_to_obo):
@@ -32,6 +37,78 @@ def load_ontology(path_to_obo):
     return pronto.Ontology(path_to_obo)  # Ignore the UnicodeWarning!
 
 
+class AncestorIndex:
+    """
+    Int-indexed stand-in for a pronto Ontology, covering only the superclass relation: for the
+    term at index i, indices[indptr[i]:indptr[i + 1]] are its superclasses in pronto's order
+    (the term itself first, then breadth-first up to the root)
+    """
+
+    def __init__(self, term_ids, indptr, indices):
+        self.term_ids = term_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.index_of = {term_id: i for i, term_id in enumerate(term_ids.tolist())}
+
+    @classmethod
+    def from_ontology(cls, ontology):
+        """
+        :param ontology: pronto Ontology object (computed in function "load_ontology")
+        :return: AncestorIndex over every term in the ontology
+        """
+
+        term_ids = [term.id for term in ontology.terms()]
+        index_of = {term_id: i for i, term_id in enumerate(term_ids)}
+
+        indptr = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        rows = []
+        for i, term_id in enumerate(term_ids):
+            row = [index_of[parent.id] for parent in ontology[term_id].superclasses()]
+            rows.append(row)
+            indptr[i + 1] = indptr[i] + len(row)
+
+        indices = np.fromiter(chain.from_iterable(rows), dtype=np.int32, count=int(indptr[-1]))
+        return cls(np.array(term_ids), indptr, indices)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: .npz file written by AncestorIndex.save
+        :return: the AncestorIndex stored there
+        """
+
+        with np.load(path) as arrays:
+            return cls(arrays['term_ids'], arrays['indptr'], arrays['indices'])
+
+    def save(self, path):
+        """
+        :param path: destination .npz file (stored uncompressed so it loads quickly)
+        """
+
+        np.savez(path, term_ids=self.term_ids, indptr=self.indptr, indices=self.indices)
+
+    def superclass_ids(self, term_id):
+        """
+        :param term_id: specific HPO term (e.g., 'HP:0000164'); unknown IDs raise KeyError, as in pronto
+        :return: list of the term's superclass IDs, the term itself first
+        """
+
+        i = self.index_of[term_id]
+        return self.term_ids[self.indices[self.indptr[i]:self.indptr[i + 1]]].tolist()
+
+
+def get_superclass_ids(ontology, term_id):
+    """
+    :param ontology: pronto Ontology or AncestorIndex
+    :param term_id: specific HPO term (e.g., 'HP:0000164')
+    :return: list of the term's superclass IDs, the term itself first
+    """
+
+    if isinstance(ontology, AncestorIndex):
+        return ontology.superclass_ids(term_id)
+    return [parent.id for parent in ontology[term_id].superclasses()]
+
+
 def read_disease_annotations(hpo_disease_annotations):
     """
     :param hpo_disease_annotations: full path to the tab-delimited "phenotype.hpoa" file downloaded from HPO
@@ -72,16 +149,12 @@ def hpo_term_probability(disease_to_hpo):
     :return: dictionary from HPO ID -> probability (to be used in information content calculations)
     """
 
-    hpo_disease_prob = {}
-    total_annotated_diseases = len(disease_to_hpo.keys())
+    total_annotated_diseases = len(disease_to_hpo)
 
-    for disease, hpo_set in disease_to_hpo.items():
-        for hpo_id in hpo_set:
-            hpo_disease_prob[hpo_id] = hpo_disease_prob.get(hpo_id, 0) + 1
-    for hpo_id in hpo_disease_prob.keys():
-        hpo_disease_prob[hpo_id] = hpo_disease_prob[hpo_id] / total_annotated_diseases
+    # count, per term, how many diseases are annotated with it (Counter tallies in C)
+    term_counts = Counter(chain.from_iterable(disease_to_hpo.values()))
 
-    return hpo_disease_prob
+    return {hpo_id: count / total_annotated_diseases for hpo_id, count in term_counts.items()}
 
 
 def IC_term(hpo_term, probabilities):
@@ -111,24 +184,65 @@ def IC(term_set, probabilities):
     return total_information_content
 
 
+def IC_array(probabilities, anc_index):
+    """
+    :param probabilities: dictionary from HPO ID -> probability (computed in function "hpo_term_probability")
+    :param anc_index: AncestorIndex whose term order gives the array positions
+    :return: numpy array of each term's information content (0 where there is no probability), so the
+             IC of a set of term indices is ic_array[term_idxs].sum()
+    """
+
+    prob = np.zeros(len(anc_index.term_ids))
+    for hpo_id, p in probabilities.items():
+        i = anc_index.index_of.get(hpo_id)
+        if i is not None:
+            prob[i] = p
+
+    ic_array = np.zeros_like(prob)
+    annotated = prob > 0
+    ic_array[annotated] = -np.log2(prob[annotated])
+    return ic_array
+
+
+# per-ontology memo of get_ancestors_up_to_root results, keyed by id(ontology);
+# pronto Ontology objects are unhashable, so each entry is dropped by a
+# weakref finalizer when its ontology is garbage-collected
+_ancestor_caches = {}
+
+
+def _ancestor_cache(ontology):
+    key = id(ontology)
+    cache = _ancestor_caches.get(key)
+    if cache is None:
+        cache = _ancestor_caches[key] = {}
+        weakref.finalize(ontology, _ancestor_caches.pop, key, None)
+    return cache
+
+
 def get_ancestors_up_to_root(ontology, start_term, stop_term='HP:0000118'):
     """
-    :param ontology: pronto Ontology object (computed in function "load_ontology")
+    :param ontology: pronto Ontology object (computed in function "load_ontology") or AncestorIndex
     :param start_term: specific HPO term (e.g., 'HP:0000164')
     :param stop_term: root term, known to be 'HP:0000118' (phenotypic abnormality)
-    :return: set of all parent terms up to the root term
+    :return: frozenset of all parent terms up to the root term (memoised per ontology, since
+             the same terms recur across thousands of diseases)
     """
 
-    ancestors = set()
-    current_term = ontology[start_term]
+    cache = _ancestor_cache(ontology)
+    ancestors = cache.get((start_term, stop_term))
+    if ancestors is not None:
+        return ancestors
 
-    for parent in current_term.superclasses():
-        if parent.id == current_term.id: # first item is always the term itself
+    found = set()
+
+    for parent_id in get_superclass_ids(ontology, start_term):
+        if parent_id == start_term: # first item is always the term itself
             continue
-        if parent.id == stop_term:
+        if parent_id == stop_term:
             break
-        ancestors.add(parent.id)
+        found.add(parent_id)
 
+    ancestors = cache[(start_term, stop_term)] = frozenset(found)
     return ancestors
 
 
@@ -161,15 +275,25 @@ if __name__ == "__main__":
         if child_term.id != root_term:
             level_one_categories.add(child_term.id)
 
-    # now, iterate through the patient HPO terms to determine which level one categories are in their ancestral sets:
-    category_counts = {}  # fill this dictionary with level one category -> # patient phenotype terms in this category
+    # now, determine which level one categories are in each patient term's ancestral set:
+    # is_l1_ancestor[term index, category index] is True when the category is a superclass of the term
+    anc_index = AncestorIndex.from_ontology(pheno_ontology)
+    level_one_ids = sorted(level_one_categories)
+
+    category_col = np.full(len(anc_index.term_ids), -1)
+    category_col[[anc_index.index_of[k] for k in level_one_ids]] = np.arange(len(level_one_ids))
 
-    for term_id in patient:
-        for parent in pheno_ontology[term_id].superclasses():
-            if parent.id in level_one_categories:
-                category_counts[parent.id] = category_counts.get(parent.id, 0) + 1
+    term_rows = np.repeat(np.arange(len(anc_index.term_ids)), np.diff(anc_index.indptr))
+    superclass_cols = category_col[anc_index.indices]
+    in_category = superclass_cols >= 0
+    is_l1_ancestor = np.zeros((len(anc_index.term_ids), len(level_one_ids)), dtype=bool)
+    is_l1_ancestor[term_rows[in_category], superclass_cols[in_category]] = True
 
-    for v, k in sorted([(v, k) for k, v in category_counts.items()], reverse=True):
+    # level one category -> # patient phenotype terms in this category, in one reduction
+    patient_idxs = np.array([anc_index.index_of[t] for t in patient])
+    category_counts = is_l1_ancestor[patient_idxs].sum(axis=0)
+
+    for v, k in sorted([(int(v), k) for k, v in zip(level_one_ids, category_counts) if v], reverse=True):
         print(k + '\t' + pheno_ontology[k].name + ' (' + str(v) + ' terms)')
 
     # -----------------------------------------------------------------------------------------------
@@ -178,7 +302,7 @@ if __name__ == "__main__":
     # get the patient's ancestral set of phenotype terms:
     patient_ancestral_set = set()
     for hpo_term in patient:
-        patient_ancestral_set.update(get_ancestors_up_to_root(pheno_ontology, hpo_term))
+        patient_ancestral_set.update(get_ancestors_up_to_root(anc_index, hpo_term))
 
     # (1) get each disease's ancestral set of phenotype terms
     # (2) compute the overlap between the disease's and patient's ancestral terms
@@ -187,15 +311,23 @@ if __name__ == "__main__":
     disease_to_hpo, disease_to_name = read_disease_annotations(path_to_disease_anno)
     hpo_disease_prob = hpo_term_probability(disease_to_hpo)
 
+    # IC per term index, and a mask of the patient's ancestral terms: each disease's score is then
+    # a table lookup + sum over its ancestral terms that fall inside the mask
+    ic_array = IC_array(hpo_disease_prob, anc_index)
+    in_patient = np.zeros(len(anc_index.term_ids), dtype=bool)
+    in_patient[[anc_index.index_of[t] for t in patient_ancestral_set]] = True
+
     disease_patient_sim_scores = []  # tuples of disease similarity score, disease name
     for disease, hpo_set in disease_to_hpo.items():
 
         disease_ancestral_set = set()
 
         for hpo_term in hpo_set:
-            disease_ancestral_set.update(get_ancestors_up_to_root(pheno_ontology, hpo_term))
-        disease_patient_sim_scores.append((IC(patient_ancestral_set.intersection(disease_ancestral_set),
-                                              hpo_disease_prob), disease))
+            disease_ancestral_set.update(get_ancestors_up_to_root(anc_index, hpo_term))
+        disease_idxs = np.fromiter((anc_index.index_of[t] for t in disease_ancestral_set),
+                                   dtype=np.int32, count=len(disease_ancestral_set))
+        overlap_idxs = disease_idxs[in_patient[disease_idxs]]
+        disease_patient_sim_scores.append((float(ic_array[overlap_idxs].sum()), disease))
 
     # print out the top 10 diseases:
     top_diseases = sorted(disease_patient_sim_scores, reverse=True)[:10]
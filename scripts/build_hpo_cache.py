@@ -0,0 +1,43 @@
+"""
+scripts/build_hpo_cache.py — Precompute the HPO superclass index that
+load_all() reads instead of parsing hp.obo on every startup.
+
+Owner: WS1 (Data & Retrieval)
+
+Re-run whenever data/raw/hp.obo is updated (an older index is ignored).
+
+Usage:  python -m scripts.build_hpo_cache
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+# Ensure project root is importable
+sys.path.insert(0, ".")
+
+import hpo_functions
+from core.data_loader import ANCESTOR_INDEX_PATH
+
+
+OBO_PATH = "data/raw/hp.obo"
+
+
+def main() -> None:
+    """Parse hp.obo once and save every term's superclasses as int arrays."""
+    t0 = time.time()
+    print("Loading ontology from", OBO_PATH, "...")
+    ontology = hpo_functions.load_ontology(OBO_PATH)
+
+    print("Building ancestor index...")
+    index = hpo_functions.AncestorIndex.from_ontology(ontology)
+    print(f"  -> {len(index.term_ids)} terms, {len(index.indices)} superclass links")
+
+    ANCESTOR_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    index.save(ANCESTOR_INDEX_PATH)
+    print(f"Saved {ANCESTOR_INDEX_PATH} in {time.time() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,15 +10,84 @@ Usage:  python -m scripts.ingest_diseases
 
 from __future__ import annotations
 
+import functools
+import os
 import sys
-import xml.etree.ElementTree as ET
 
 sys.path.insert(0, ".")
 
+from lxml import etree
 from pymongo import UpdateOne
 from core.database import get_db
 
 XML_PATH = "data/raw/en_product4.xml"
+BULK_CHUNK = 500  # UpdateOne ops per bulk_write
+SCAN_BATCH = 5000  # documents per cursor round-trip for the lookup scan
+
+
+@functools.cache
+def _disorder_xpaths(ns_uri: str | None) -> dict[str, etree.XPath]:
+    """Compiled XPaths over one <Disorder>, for the document's namespace."""
+    p = "o:" if ns_uri else ""
+    namespaces = {"o": ns_uri} if ns_uri else None
+
+    def xp(path: str) -> etree.XPath:
+        return etree.XPath(path.format(p=p), namespaces=namespaces)
+
+    return {
+        "orpha_code": xp("{p}OrphaCode/text()"),
+        "name": xp("{p}Name/text()"),
+        "associations": xp("descendant::{p}HPODisorderAssociation"),
+        "hpo_id": xp("descendant::{p}HPOId[1]/text()"),
+        "frequency": xp("descendant::{p}HPOFrequency/{p}Name[1]/text()"),
+        "inheritance": xp("descendant::{p}TypeOfInheritance/{p}Name[1]/text()"),
+        "genes": xp("descendant::{p}Gene/{p}Symbol/text()"),
+    }
+
+
+def _first(values: list[str]) -> str | None:
+    return values[0] if values else None
+
+
+def _extract_disorder(disorder: etree._Element) -> tuple[str | None, str, dict]:
+    """Return (orpha_num, disease_name, orphanet sub-document) for one <Disorder>."""
+    xp = _disorder_xpaths(etree.QName(disorder).namespace)
+
+    orpha_num = _first(xp["orpha_code"](disorder))
+    name = _first(xp["name"](disorder))
+    disease_name = name.strip() if name else ""
+
+    hpo_assocs = []
+    for assoc in xp["associations"](disorder):
+        hpo_id = _first(xp["hpo_id"](assoc))
+        if hpo_id:
+            freq = _first(xp["frequency"](assoc))
+            hpo_assocs.append({
+                "hpo_id": hpo_id.strip(),
+                "frequency": freq.strip() if freq else "Unknown",
+            })
+
+    inheritance = _first(xp["inheritance"](disorder))
+    genes = [sym.strip() for sym in xp["genes"](disorder) if sym]
+
+    return orpha_num, disease_name, {
+        "orpha_code": orpha_num,
+        "name": disease_name,
+        "hpo_associations": hpo_assocs,
+        "inheritance": inheritance.strip() if inheritance else None,
+        "genes": genes,
+    }
+
+
+def _release(elem: etree._Element) -> None:
+    """Free a processed element and every finished sibling before it and its ancestors."""
+    elem.clear(keep_tail=True)
+    for node in (elem, *elem.iterancestors()):
+        parent = node.getparent()
+        if parent is None:
+            break
+        while node.getprevious() is not None:
+            del parent[0]
 
 
 def main() -> None:
@@ -29,66 +98,40 @@ def main() -> None:
 
     print(f"Parsing Orphanet XML: {XML_PATH}")
 
-    try:
-        tree = ET.parse(XML_PATH)
-    except FileNotFoundError:
+    if not os.path.isfile(XML_PATH):
         print(f"  !! {XML_PATH} not found — skipping Orphanet enrichment.")
         print("  The pipeline works without it (disease matching uses HPOA data).")
         return
-
-    root = tree.getroot()
+    # Stream only the <Disorder> elements (any namespace) with libxml2; each
+    # is released once processed, so memory stays flat.
+    disorders = etree.iterparse(XML_PATH, events=("end",), tag="{*}Disorder", huge_tree=True)
 
     # Build lookups from existing MongoDB docs for matching (in-memory for speed)
     print("Building id/name lookups from existing disease_profiles...")
-    existing_ids: set[str] = set()
-    name_to_id: dict[str, str] = {}
-    for doc in col.find({}, {"_id": 1, "name": 1}):
-        existing_ids.add(doc["_id"])
-        if doc.get("name"):
-            name_to_id[doc["name"].lower().strip()] = doc["_id"]
+    docs = list(col.find({}, {"_id": 1, "name": 1}).batch_size(SCAN_BATCH))
+    existing_ids = {doc["_id"] for doc in docs}
+    name_to_id = {doc["name"].lower().strip(): doc["_id"] for doc in docs if doc.get("name")}
     print(f"  -> {len(existing_ids)} existing profiles loaded")
 
-    # Namespace handling — Orphanet XML may use a default namespace
-    ns = ""
-    if root.tag.startswith("{"):
-        ns = root.tag.split("}")[0] + "}"
-
     updated = 0
     skipped = 0
+    matched_count = 0
+    modified_count = 0
     bulk_ops: list[UpdateOne] = []
 
-    for disorder in root.iter(f"{ns}Disorder"):
-        # Extract Orphanet number
-        orpha_num_el = disorder.find(f"{ns}OrphaCode")
-        orpha_num = orpha_num_el.text if orpha_num_el is not None else None
-
-        # Extract disease name
-        name_el = disorder.find(f"{ns}Name")
-        disease_name = name_el.text.strip() if name_el is not None and name_el.text else ""
-
-        # Extract HPO associations
-        hpo_assocs = []
-        for assoc in disorder.iter(f"{ns}HPODisorderAssociation"):
-            hpo_el = assoc.find(f".//{ns}HPOId")
-            freq_el = assoc.find(f".//{ns}HPOFrequency/{ns}Name")
-            if hpo_el is not None and hpo_el.text:
-                hpo_assocs.append({
-                    "hpo_id": hpo_el.text.strip(),
-                    "frequency": freq_el.text.strip() if freq_el is not None and freq_el.text else "Unknown",
-                })
-
-        # Extract inheritance
-        inheritance = None
-        inh_el = disorder.find(f".//{ns}TypeOfInheritance/{ns}Name")
-        if inh_el is not None and inh_el.text:
-            inheritance = inh_el.text.strip()
-
-        # Extract genes
-        genes = []
-        for gene_el in disorder.iter(f"{ns}Gene"):
-            sym_el = gene_el.find(f"{ns}Symbol")
-            if sym_el is not None and sym_el.text:
-                genes.append(sym_el.text.strip())
+    def flush() -> None:
+        nonlocal matched_count, modified_count
+        if bulk_ops:
+            result = col.bulk_write(bulk_ops, ordered=False)
+            matched_count += result.matched_count
+            modified_count += result.modified_count
+            bulk_ops.clear()
+
+    for _, disorder in disorders:
+        orpha_num, disease_name, orphanet_data = _extract_disorder(disorder)
+        # A <Disorder> nested in another is still needed by its parent
+        if not any(etree.QName(a).localname == "Disorder" for a in disorder.iterancestors()):
+            _release(disorder)
 
         # Match to existing disease profile (in-memory lookup, no network call)
         matched_id = None
@@ -106,26 +149,18 @@ def main() -> None:
             skipped += 1
             continue
 
-        # Build orphanet enrichment sub-document
-        orphanet_data = {
-            "orpha_code": orpha_num,
-            "name": disease_name,
-            "hpo_associations": hpo_assocs,
-            "inheritance": inheritance,
-            "genes": genes,
-        }
-
         bulk_ops.append(UpdateOne(
             {"_id": matched_id},
             {"$set": {"orphanet": orphanet_data}},
         ))
         updated += 1
+        if len(bulk_ops) >= BULK_CHUNK:
+            flush()
 
-    # Flush all updates in one batch
-    if bulk_ops:
-        print(f"  Writing {len(bulk_ops)} updates in bulk...")
-        result = col.bulk_write(bulk_ops, ordered=False)
-        print(f"  -> bulk_write matched={result.matched_count}, modified={result.modified_count}")
+    # Flush the remaining updates
+    flush()
+    if updated:
+        print(f"  -> bulk_write matched={matched_count}, modified={modified_count}")
 
     print(f"\n=== Orphanet Enrichment Summary ===")
     print(f"  Diseases updated: {updated}")
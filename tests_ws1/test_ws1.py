@@ -0,0 +1,184 @@
+"""
+tests/test_ws1.py — Unit tests for WS1: Redis session manager.
+
+Tests are designed to run WITHOUT a Redis server; the client is replaced
+by an in-memory stand-in (string values are stored as bytes, as Redis does).
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from core.models import AgentOutput, HPOMatch
+
+
+class _FakeRedis:
+    """The Redis surface SessionManager uses, backed by plain dicts."""
+
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.lists: dict[str, list[str]] = {}
+        self.expiries: dict[str, int] = {}
+        self.pipelines: list[_FakePipeline] = []
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value.encode() if isinstance(value, str) else value
+
+    def execute_command(self, command, key, **options):
+        assert command == "GET"
+        return self.store.get(key)
+
+    def exists(self, key):
+        return int(key in self.store or key in self.hashes)
+
+    def delete(self, key):
+        self.expiries.pop(key, None)
+        return int(self.store.pop(key, None) is not None or self.hashes.pop(key, None) is not None)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        fields = dict(mapping or {})
+        if field is not None:
+            fields[field] = value
+        self.hashes.setdefault(key, {}).update(fields)
+        return len(fields)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def expire(self, key, seconds):
+        self.expiries[key] = seconds
+        return True
+
+    def pipeline(self, transaction=True):
+        pipe = _FakePipeline(self)
+        self.pipelines.append(pipe)
+        return pipe
+
+
+class _FakePipeline:
+    """Queues commands and replays them on the fake client at execute()."""
+
+    def __init__(self, client):
+        self._client = client
+        self.commands: list[tuple] = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+@pytest.fixture
+def session_mgr():
+    from core.session_manager import SessionManager
+
+    mgr = SessionManager.__new__(SessionManager)
+    mgr._r = _FakeRedis()
+    return mgr
+
+
+def _output(n_terms: int) -> AgentOutput:
+    return AgentOutput(
+        session_id="s1",
+        patient_hpo_observed=[
+            HPOMatch(hpo_id=f"HP:{i:07d}", label=f"Term {i}") for i in range(n_terms)
+        ],
+    )
+
+
+class TestOutputRoundTrip:
+    @pytest.mark.parametrize("n_terms, compressed", [(1, False), (40, True)])
+    def test_model_round_trip(self, session_mgr, n_terms, compressed):
+        from core.session_manager import _ZSTD_MAGIC
+
+        output = _output(n_terms)
+        session_mgr.set_output("s1", output)
+
+        stored = session_mgr._r.store["session:s1:output"]
+        assert stored.startswith(_ZSTD_MAGIC) is compressed
+
+        restored = session_mgr.get_output("s1")
+        assert restored == output.model_dump()
+        assert restored["reanalysis"] is None          # None fields are kept
+        assert restored["patient_hpo_observed"][0]["definition"] is None
+
+    def test_dict_round_trip(self, session_mgr):
+        payload = _output(40).model_dump()
+        session_mgr.set_output("s1", payload)
+        assert session_mgr.get_output("s1") == payload
+
+    def test_missing_output(self, session_mgr):
+        assert session_mgr.get_output("nope") is None
+
+    def test_unserialisable_output_is_logged_not_raised(self, session_mgr):
+        session_mgr.set_output("s1", {"n": 2**70})  # beyond orjson's 64-bit ints
+        assert session_mgr.get_output("s1") is None
+
+
+class TestContext:
+    def test_round_trip(self, session_mgr):
+        context = {"hpo_ids": ["HP:0001250"], "age": 4, "notes": None}
+        session_mgr.set_context("s1", context)
+
+        assert session_mgr.get_context("s1") == context
+        assert session_mgr._r.expiries["session:s1:context"] == session_mgr.TTL
+
+    def test_set_replaces_previous_fields(self, session_mgr):
+        session_mgr.set_context("s1", {"a": 1, "b": 2})
+        session_mgr.set_context("s1", {"a": 3})
+        assert session_mgr.get_context("s1") == {"a": 3}
+
+    def test_unserialisable_context_is_logged_not_raised(self, session_mgr):
+        session_mgr.set_context("s1", {"n": 2**70})
+        assert session_mgr.get_context("s1") is None
+
+    def test_update_existing_field(self, session_mgr):
+        session_mgr.set_context("s1", {"a": 1, "b": [1, 2]})
+        session_mgr.update_context_field("s1", "b", {"nested": True})
+        assert session_mgr.get_context("s1") == {"a": 1, "b": {"nested": True}}
+
+    def test_update_without_context_is_skipped(self, session_mgr):
+        session_mgr.update_context_field("s1", "a", 1)
+        assert session_mgr.get_context("s1") is None
+
+    def test_empty_context_deletes_key(self, session_mgr):
+        session_mgr.set_context("s1", {"a": 1})
+        session_mgr.set_context("s1", {})
+        assert "session:s1:context" not in session_mgr._r.hashes
+        assert session_mgr.get_context("s1") is None
+
+
+class TestToolLog:
+    def test_batch_is_one_round_trip(self, session_mgr):
+        records = [
+            {"tool_name": f"tool_{i}", "input_data": {"i": i}, "output_data": [i]}
+            for i in range(3)
+        ]
+        session_mgr.log_tool_calls_batch("s1", records)
+
+        (pipe,) = session_mgr._r.pipelines
+        assert [name for name, _, _ in pipe.commands] == ["rpush", "expire"]
+        _, rpush_args, _ = pipe.commands[0]
+        assert rpush_args[0] == "session:s1:tools"
+        assert len(rpush_args) - 1 == len(records)
+
+        log = session_mgr.get_tool_log("s1")
+        assert [rec["tool_name"] for rec in log] == ["tool_0", "tool_1", "tool_2"]
+        assert len({rec["timestamp"] for rec in log}) == 1
+
+    def test_empty_batch_is_a_no_op(self, session_mgr):
+        session_mgr.log_tool_calls_batch("s1", [])
+        assert session_mgr._r.pipelines == []
@@ -9,7 +9,7 @@ from __future__ import annotations
 
 import asyncio
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -65,6 +65,21 @@ class TestPipelineState:
         assert len(snap["hpo_matches"]) == 1
         assert snap["hpo_matches"][0]["hpo_id"] == "HP:0001250"
 
+    def test_set_hpo_matches_first_wins(self):
+        from agent.state import PipelineState
+
+        state = PipelineState()
+        state.set_hpo_matches([
+            HPOMatch(hpo_id="HP:0001250", label="Seizures"),
+            HPOMatch(hpo_id="", label="Unmapped"),
+            HPOMatch(hpo_id="HP:0001250", label="Seizure"),
+            HPOMatch(hpo_id="HP:0001252", label="Hypotonia"),
+        ])
+
+        assert [m.label for m in state.hpo_matches] == ["Seizures", "Hypotonia"]
+        assert state.hpo_ids == ["HP:0001250", "HP:0001252"]
+        assert state.hpo_labels == ["Seizures", "Hypotonia"]
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 2. LLM Client tests
@@ -96,12 +111,131 @@ class TestExtractJson:
         result = extract_json('{"key": {"nested": true}}')
         assert result == {"key": {"nested": True}}
 
+    def test_truncated_object_repaired(self):
+        from agent.llm_client import extract_json
+
+        result = extract_json('{"differential": [{"disease": "Test", "confidence": "lo')
+        assert result["differential"][0]["disease"] == "Test"
+
     def test_invalid_raises(self):
         from agent.llm_client import extract_json
 
         with pytest.raises(json.JSONDecodeError):
             extract_json("no json here at all")
 
+    def test_prose_with_stray_brace_raises(self):
+        from agent.llm_client import extract_json
+
+        with pytest.raises(json.JSONDecodeError):
+            extract_json("Note: {see above} nothing here")
+
+    def test_empty_repair_raises(self):
+        from agent.llm_client import extract_json
+
+        with pytest.raises(json.JSONDecodeError):
+            extract_json("Result: { ")
+
+
+def _astream(*parts):
+    """Stand-in for ``acall_llm_stream`` yielding *parts*."""
+    async def gen(*args, **kwargs):
+        for part in parts:
+            yield part
+    return gen
+
+
+def _stream_chunk(content=None, reasoning=None, finish_reason=None):
+    delta = MagicMock(content=content, reasoning_content=reasoning)
+    choice = MagicMock(delta=delta, finish_reason=finish_reason)
+    return MagicMock(choices=[choice])
+
+
+def _achunks(*chunks):
+    """Async iterator over stream *chunks*, as ``AsyncOpenAI`` returns."""
+    async def gen():
+        for chunk in chunks:
+            yield chunk
+    return gen()
+
+
+def _collect(agen):
+    async def run():
+        return [t async for t in agen]
+    return asyncio.run(run())
+
+
+class TestCallLlmStream:
+    @patch("agent.llm_client.get_async_client")
+    def test_yields_content_deltas(self, mock_get_client):
+        from agent.llm_client import acall_llm_stream
+
+        mock_get_client.return_value.chat.completions.create = AsyncMock(return_value=_achunks(
+            _stream_chunk(content='{"a": '),
+            _stream_chunk(content="1}", finish_reason="stop"),
+        ))
+
+        assert "".join(_collect(acall_llm_stream("sys", "user"))) == '{"a": 1}'
+
+    @patch("agent.llm_client.get_async_client")
+    def test_falls_back_to_reasoning_content(self, mock_get_client):
+        from agent.llm_client import acall_llm_stream
+
+        mock_get_client.return_value.chat.completions.create = AsyncMock(return_value=_achunks(
+            _stream_chunk(reasoning="[1, "),
+            _stream_chunk(reasoning="2]", finish_reason="stop"),
+        ))
+
+        assert _collect(acall_llm_stream("sys", "user")) == ["[1, 2]"]
+
+    @patch("agent.llm_client.get_async_client")
+    def test_cache_hit_skips_client(self, mock_get_client, tmp_path):
+        import diskcache
+        from agent import llm_client
+
+        cache = diskcache.Cache(str(tmp_path))
+        create = mock_get_client.return_value.chat.completions.create = AsyncMock(
+            side_effect=lambda **kw: _achunks(_stream_chunk(content="[1]", finish_reason="stop"))
+        )
+        with patch.object(llm_client, "LLM_CACHE", True), \
+                patch.object(llm_client, "_get_response_cache", return_value=cache):
+            assert "".join(_collect(llm_client.acall_llm_stream("sys", "user"))) == "[1]"
+            assert "".join(_collect(llm_client.acall_llm_stream("sys", "user"))) == "[1]"
+
+        assert create.call_count == 1
+
+
+class TestRateLimiting:
+    def test_limiter_aimd(self):
+        from agent.llm_client import AdaptiveRateLimiter
+
+        limiter = AdaptiveRateLimiter(60, burst=1, min_rpm=10, max_rpm=62)
+        assert limiter.reserve() == 0.0
+        assert limiter.reserve() > 0.0          # bucket drained
+        limiter.on_throttle()
+        assert limiter.rpm == 30
+        for _ in range(100):
+            limiter.on_success()
+        assert limiter.rpm == 62                # capped
+
+    @patch("agent.llm_client.time.sleep")
+    def test_retries_rate_limit_honouring_retry_after(self, mock_sleep):
+        import httpx
+        from openai import RateLimitError
+        from agent import llm_client
+
+        request = httpx.Request("POST", "https://example.invalid")
+        throttled = RateLimitError(
+            "slow down",
+            response=httpx.Response(429, headers={"retry-after": "7"}, request=request),
+            body=None,
+        )
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [throttled, "ok"]
+
+        assert llm_client._create_with_retry(client, model="m") == "ok"
+        assert client.chat.completions.create.call_count == 2
+        assert max(c.args[0] for c in mock_sleep.call_args_list) >= 7
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 3. Excluded Extract tests
@@ -302,6 +436,42 @@ class TestOnsetStageNormalisation:
         assert _normalise_onset_stage(30.0) == "Adult"
 
 
+MOCK_COMBINED_LLM_RESPONSE = json.dumps({
+    "excluded": json.loads(MOCK_EXCLUDED_LLM_RESPONSE),
+    "timing": json.loads(MOCK_TIMING_LLM_RESPONSE),
+})
+
+
+class TestCombinedExtract:
+    @patch("tools.combined_extract.call_llm", return_value=MOCK_COMBINED_LLM_RESPONSE)
+    def test_both_branches_parsed(self, mock_llm):
+        from tools.combined_extract import run
+
+        excluded, timing = run(
+            "No seizures have ever been reported. Hypotonia was noted since birth.",
+            ["Hypotonia"],
+            {"seizures": "HP:0001250"},
+        )
+
+        assert mock_llm.call_count == 1
+        assert len(excluded) == 3
+        assert all(isinstance(e, ExcludedFinding) for e in excluded)
+        assert all(isinstance(t, TimingProfile) for t in timing)
+        assert timing
+
+    @patch("tools.combined_extract.call_llm", return_value=json.dumps({"excluded": []}))
+    def test_missing_branch_returns_none(self, mock_llm):
+        from tools.combined_extract import run
+
+        assert run("Some note text.", ["Hypotonia"], {}) is None
+
+    @patch("tools.combined_extract.call_llm", return_value="not valid json at all")
+    def test_invalid_json_returns_none(self, mock_llm):
+        from tools.combined_extract import run
+
+        assert run("Some note text.", ["Hypotonia"], {}) is None
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # 5. Data Completeness tests
 # ═══════════════════════════════════════════════════════════════════════════
@@ -404,6 +574,19 @@ MOCK_FINAL_REASONING_RESPONSE = json.dumps({
 class TestPipeline:
     """Integration tests for the full pipeline with WS1 stubs and mocked LLM."""
 
+    def _make_data(self):
+        """Empty reference data with every key the WS1 tools read."""
+        return {
+            "ontology": None,
+            "hpo_index": {},
+            "synonym_index": {},
+            "ic_scores": {},
+            "disease_to_hpo": {},
+            "disease_ancestors": {},
+            "disease_to_name": {},
+            "orphanet_profiles": {},
+        }
+
     def _make_mock_session_mgr(self):
         mgr = MagicMock(spec=[
             "create_session", "log_tool_call", "get_tool_log",
@@ -412,13 +595,13 @@ class TestPipeline:
         # Make all methods no-ops (don't raise NotImplementedError)
         return mgr
 
-    @patch("agent.pipeline.call_llm", return_value=MOCK_FINAL_REASONING_RESPONSE)
-    def test_hpo_only_degraded(self, mock_llm):
+    @patch("agent.pipeline.acall_llm_stream", new=_astream(MOCK_FINAL_REASONING_RESPONSE))
+    def test_hpo_only_degraded(self):
         """Pipeline with HPO terms only, all WS1 stubs → degraded but valid output."""
         from agent.pipeline import run_pipeline
 
         patient = PatientInput(hpo_terms=["HP:0001250", "HP:0001252"])
-        data = {"ontology": None, "synonym_index": {}}
+        data = self._make_data()
         mgr = self._make_mock_session_mgr()
 
         output = asyncio.run(run_pipeline(patient, data, mgr))
@@ -431,10 +614,11 @@ class TestPipeline:
         assert isinstance(output.next_best_steps, list)
         assert isinstance(output.uncertainty, UncertaintySummary)
 
-    @patch("agent.pipeline.call_llm", return_value=MOCK_FINAL_REASONING_RESPONSE)
+    @patch("agent.pipeline.acall_llm_stream", new=_astream(MOCK_FINAL_REASONING_RESPONSE))
     @patch("tools.excluded_extract.call_llm", return_value=MOCK_EXCLUDED_LLM_RESPONSE)
     @patch("tools.timing_extract.call_llm", return_value=MOCK_TIMING_LLM_RESPONSE)
-    def test_free_text_pipeline(self, mock_timing, mock_excluded, mock_llm):
+    @patch("tools.combined_extract.call_llm", side_effect=RuntimeError)
+    def test_free_text_pipeline(self, mock_combined, mock_timing, mock_excluded):
         """Pipeline with free text triggers extraction tools."""
         from agent.pipeline import run_pipeline
 
@@ -444,7 +628,7 @@ class TestPipeline:
                 "Hearing was tested and confirmed normal."
             ),
         )
-        data = {"ontology": None, "synonym_index": {}}
+        data = self._make_data()
         mgr = self._make_mock_session_mgr()
 
         output = asyncio.run(run_pipeline(patient, data, mgr))
@@ -454,13 +638,42 @@ class TestPipeline:
         assert len(output.patient_hpo_excluded) == 3
         assert all(isinstance(e, ExcludedFinding) for e in output.patient_hpo_excluded)
 
-    @patch("agent.pipeline.call_llm", return_value=MOCK_FINAL_REASONING_RESPONSE)
-    def test_empty_input(self, mock_llm):
+    @patch("agent.pipeline.acall_llm_stream", new=_astream(MOCK_FINAL_REASONING_RESPONSE))
+    @patch("tools.excluded_extract.call_llm")
+    @patch("tools.combined_extract.call_llm", return_value=MOCK_COMBINED_LLM_RESPONSE)
+    def test_free_text_single_extraction_call(self, mock_combined, mock_excluded):
+        """A usable combined response skips the single-task extraction calls."""
+        from agent.pipeline import run_pipeline
+
+        patient = PatientInput(free_text="No seizures have ever been reported.")
+        output = asyncio.run(run_pipeline(patient, self._make_data(), self._make_mock_session_mgr()))
+
+        assert mock_combined.call_count == 1
+        mock_excluded.assert_not_called()
+        assert len(output.patient_hpo_excluded) == 3
+
+    @patch("agent.pipeline.acall_llm_stream", new=_astream(MOCK_FINAL_REASONING_RESPONSE))
+    @patch("tools.orphanet_fetch.run", return_value=[])
+    @patch("tools.disease_match.run")
+    def test_profiles_prefetched_once_when_ranking_unchanged(self, mock_match, mock_fetch):
+        from agent.pipeline import run_pipeline
+
+        mock_match.return_value = [
+            DiseaseCandidate(rank=1, disease_id="ORPHA:1", disease_name="A", sim_score=1.0),
+        ]
+        patient = PatientInput(hpo_terms=["HP:0001250"])
+        asyncio.run(run_pipeline(patient, self._make_data(), self._make_mock_session_mgr()))
+
+        mock_fetch.assert_called_once()
+        assert mock_fetch.call_args.args[0] == ["ORPHA:1"]
+
+    @patch("agent.pipeline.acall_llm_stream", new=_astream(MOCK_FINAL_REASONING_RESPONSE))
+    def test_empty_input(self):
         """Pipeline with empty input should still return valid output."""
         from agent.pipeline import run_pipeline
 
         patient = PatientInput()
-        data = {"ontology": None, "synonym_index": {}}
+        data = self._make_data()
         mgr = self._make_mock_session_mgr()
 
         output = asyncio.run(run_pipeline(patient, data, mgr))
@@ -483,7 +696,7 @@ class TestPipeline:
         ]
 
         patient = PatientInput(hpo_terms=["HP:0002133"])
-        data = {"ontology": None, "synonym_index": {}}
+        data = self._make_data()
         mgr = self._make_mock_session_mgr()
 
         output = asyncio.run(run_pipeline(patient, data, mgr))
@@ -495,13 +708,13 @@ class TestPipeline:
         assert output.differential == []
         assert output.patient_hpo_observed == []
 
-    @patch("agent.pipeline.call_llm", return_value="totally broken json }{{{")
-    def test_llm_failure_degraded_output(self, mock_llm):
+    @patch("agent.pipeline.acall_llm_stream", new=_astream("totally broken json }{{{"))
+    def test_llm_failure_degraded_output(self):
         """If LLM returns garbage, pipeline produces degraded but valid output."""
         from agent.pipeline import run_pipeline
 
         patient = PatientInput(hpo_terms=["HP:0001250"])
-        data = {"ontology": None, "synonym_index": {}}
+        data = self._make_data()
         mgr = self._make_mock_session_mgr()
 
         output = asyncio.run(run_pipeline(patient, data, mgr))
@@ -530,6 +743,14 @@ class TestFreeTextSplitting:
 
         assert _split_free_text("") == []
 
+    def test_and_only_splits_whole_word(self):
+        from agent.pipeline import _split_free_text
+
+        assert _split_free_text("grand mal seizures and  band keratopathy; ab") == [
+            "grand mal seizures",
+            "band keratopathy",
+        ]
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 8. Degraded output builder test
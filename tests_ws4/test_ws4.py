@@ -0,0 +1,134 @@
+"""
+tests/test_ws4.py — Unit tests for WS4: evaluation scoring and harness.
+
+Tests are designed to run WITHOUT Azure credentials, MongoDB or Redis.
+The pipeline and the gold-case collection are monkeypatched.
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.models import AgentOutput, DifferentialEntry, HPOMatch
+
+
+def _output(disease_ids, hpo_ids):
+    return AgentOutput(
+        differential=[
+            DifferentialEntry(disease=did, disease_id=did, confidence="low", confidence_reasoning="")
+            for did in disease_ids
+        ],
+        patient_hpo_observed=[HPOMatch(hpo_id=h, label=h) for h in hpo_ids],
+    )
+
+
+# ---------------------------------------------------------------------------
+# score_case
+# ---------------------------------------------------------------------------
+
+class TestScoreCase:
+    def test_best_rank_sets_top_k_hits(self):
+        from eval.score import score_case
+
+        output = _output([f"OMIM:{i}" for i in range(8)], ["HP:1", "HP:2"])
+        result = score_case(output, {
+            "expected_disease_ids": ["OMIM:404", "OMIM:4"],
+            "expected_hpo_ids": ["HP:1", "HP:3"],
+        })
+
+        assert result == {
+            "top1_hit": False, "top3_hit": False, "top5_hit": True, "top10_hit": True,
+            "hpo_recall": 0.5,
+        }
+
+    def test_nothing_expected(self):
+        from eval.score import score_case
+
+        result = score_case(_output(["OMIM:1"], ["HP:1"]), {})
+        assert not any(result[f"top{k}_hit"] for k in (1, 3, 5, 10))
+        assert result["hpo_recall"] == 0.0
+
+
+# ---------------------------------------------------------------------------
+# _aggregate / run_eval
+# ---------------------------------------------------------------------------
+
+class TestAggregate:
+    def test_means_skip_failed_cases(self):
+        from eval.score import _aggregate
+
+        summary = _aggregate([
+            {"case_id": 1, "top1_hit": True, "hpo_recall": 1.0},
+            {"case_id": 2, "top1_hit": False, "hpo_recall": 0.5},
+            {"case_id": 3, "error": "RuntimeError: boom"},
+        ])
+
+        assert summary["n_cases"] == 3
+        assert summary["n_failed"] == 1
+        # Numeric case_ids are metadata, not a metric
+        assert summary["metrics"] == {"top1_hit": 0.5, "hpo_recall": 0.75}
+
+    def test_empty(self):
+        from eval.score import _aggregate
+
+        assert _aggregate([]) == {"n_cases": 0, "n_failed": 0, "metrics": {}, "per_case": []}
+
+
+class TestRunEval:
+    def test_failed_case_is_recorded(self):
+        from eval import score
+
+        cases = [
+            {"_id": "p1", "patient_input": {"hpo_terms": ["HP:1"]},
+             "expected_disease_ids": ["OMIM:1"], "expected_hpo_ids": ["HP:1"]},
+            {"_id": "p2", "patient_input": {"hpo_terms": ["HP:2"]},
+             "expected_disease_ids": ["OMIM:2"], "expected_hpo_ids": ["HP:2"]},
+        ]
+
+        async def fake_pipeline(patient_input, data, session_mgr):
+            if patient_input.hpo_terms == ["HP:2"]:
+                raise RuntimeError("boom")
+            return _output(["OMIM:1"], ["HP:1"])
+
+        with patch.object(score, "load_gold_cases", return_value=cases), \
+                patch.object(score, "run_pipeline", new=fake_pipeline):
+            summary = score.run_eval(None, {}, None)
+
+        assert summary["n_failed"] == 1
+        assert summary["metrics"]["top1_hit"] == 1.0
+        assert summary["per_case"][1] == {"case_id": "p2", "error": "RuntimeError: boom"}
+
+
+# ---------------------------------------------------------------------------
+# load_gold_cases
+# ---------------------------------------------------------------------------
+
+class TestLoadGoldCases:
+    def test_maps_curated_documents(self):
+        from eval.gold_cases import load_gold_cases
+
+        db = {"eval_gold_cases": MagicMock()}
+        db["eval_gold_cases"].find.return_value = [{
+            "_id": "patient_01",
+            "difficulty": "easy",
+            "gold_diagnosis": "OMIM:123",
+            "synthetic_note": "No seizures.",
+            "hpo_terms": ["HP:1"],
+        }]
+
+        (case,) = load_gold_cases(db)
+        assert case["patient_input"] == {"free_text": "No seizures.", "hpo_terms": ["HP:1"]}
+        assert case["expected_disease_ids"] == ["OMIM:123"]
+        assert case["expected_hpo_ids"] == ["HP:1"]
+        assert case["difficulty"] == "easy"
+
+    def test_empty_collection_fails_early(self):
+        from eval.gold_cases import load_gold_cases
+
+        db = {"eval_gold_cases": MagicMock()}
+        db["eval_gold_cases"].find.return_value = []
+
+        with pytest.raises(RuntimeError, match="eval_gold_cases"):
+            load_gold_cases(db)
@@ -0,0 +1,103 @@
+"""
+tools/combined_extract.py — Excluded findings + phenotype timing in one LLM call.
+
+Owner: WS2 (Agent & Reasoning)
+
+Runs the ``excluded_extract`` and ``timing_extract`` tasks as a single
+prompt so the clinical note is only sent (and prefilled) once.  Parsed
+items are handed to the builders of the two single-task tools, so output
+objects are identical to the parallel path.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+
+from agent.llm_client import call_llm, extract_json
+from core.models import ExcludedFinding, TimingProfile
+from tools.excluded_extract import build_findings
+from tools.timing_extract import build_profiles
+
+logger = logging.getLogger(__name__)
+
+# ── prompt (loaded once) ────────────────────────────────────────────────
+_PROMPT_PATH = os.path.join(os.path.dirname(__file__), "..", "agent", "prompts", "combined.txt")
+
+
+@functools.cache
+def _load_prompt() -> str:
+    with open(_PROMPT_PATH, "rb") as fh:
+        return fh.read().decode("utf-8")
+
+
+# ── public API ──────────────────────────────────────────────────────────
+
+def run(
+    note_text: str,
+    hpo_labels: list[str],
+    synonym_index: dict,
+) -> tuple[list[ExcludedFinding], list[TimingProfile]] | None:
+    """
+    Extract excluded findings and timing profiles with a single LLM call.
+
+    Parameters
+    ----------
+    note_text : str
+        The raw clinical note text.
+    hpo_labels : list[str]
+        Labels of already-matched HPO terms to anchor timing extraction.
+    synonym_index : dict
+        Lowercase synonym → HPO ID mapping from ``data["synonym_index"]``.
+
+    Returns
+    -------
+    tuple[list[ExcludedFinding], list[TimingProfile]] | None
+        ``(excluded, timing)``, or ``None`` if the call failed or either
+        branch could not be parsed — the caller should then fall back to
+        the two single-task tools.
+    """
+    if not note_text or not note_text.strip():
+        return [], []
+
+    phenotype_list = "\n".join(f"- {label}" for label in hpo_labels) or "(none — return an empty timing array)"
+    system_prompt = (
+        _load_prompt()
+        + "\n\nPhenotypes to extract timing for:\n"
+        + phenotype_list
+    )
+
+    # LLM call
+    try:
+        raw_response = call_llm(system=system_prompt, user=note_text)
+    except Exception:
+        logger.exception("LLM call failed in combined_extract")
+        return None
+
+    # Parse JSON
+    try:
+        payload = extract_json(raw_response)
+    except json.JSONDecodeError:
+        logger.warning("Failed to parse combined_extract LLM response: %s", raw_response[:500])
+        return None
+
+    if not isinstance(payload, dict):
+        logger.warning("Expected JSON object from combined_extract, got %s", type(payload).__name__)
+        return None
+
+    excluded_items = payload.get("excluded")
+    timing_items = payload.get("timing")
+    if not isinstance(excluded_items, list) or not isinstance(timing_items, list):
+        logger.warning("combined_extract response missing 'excluded' or 'timing' array")
+        return None
+
+    try:
+        excluded = build_findings(excluded_items, synonym_index)
+        # Mirror timing_extract: no anchored phenotypes → no timing
+        timing = build_profiles(timing_items) if hpo_labels else []
+    except Exception:
+        logger.exception("Failed to build combined_extract results")
+        return None
+    return excluded, timing
@@ -9,6 +9,8 @@ across all diseases in the database.
 
 from __future__ import annotations
 
+import numpy as np
+
 import hpo_functions
 from core.models import DiseaseCandidate
 
@@ -42,8 +44,8 @@ def run(
 
     ontology = data["ontology"]
     ic_scores: dict[str, float] = data["ic_scores"]
-    disease_to_hpo: dict[str, set] = data["disease_to_hpo"]
-    disease_ancestors: dict[str, set] = data["disease_ancestors"]
+    disease_to_hpo: dict[str, frozenset] = data["disease_to_hpo"]
+    disease_ancestors: dict[str, frozenset] = data["disease_ancestors"]
     disease_to_name: dict[str, str] = data["disease_to_name"]
 
     # ------------------------------------------------------------------
@@ -62,57 +64,125 @@ def run(
     excluded_set = set(excluded_hpo_ids) if excluded_hpo_ids else set()
 
     # ------------------------------------------------------------------
-    # 2. Score each disease
+    # 2. Score every disease at once
     # ------------------------------------------------------------------
-    scored: list[tuple[float, str]] = []
-
-    for disease_id, disease_hpo_terms in disease_to_hpo.items():
-        d_ancestors = disease_ancestors.get(disease_id, set())
-
-        # IC-weighted overlap of ancestor sets
-        overlap = patient_ancestors & d_ancestors
-        sim_score = sum(ic_scores.get(t, 0.0) for t in overlap)
-
-        # Direct term overlap
-        matched = patient_set & disease_hpo_terms
-        missing = disease_hpo_terms - patient_set
-        extra = patient_set - disease_hpo_terms
-        coverage = len(matched) / len(disease_hpo_terms) if disease_hpo_terms else 0.0
-
-        # Exclusion penalty
-        has_penalty = False
-        if excluded_set and (excluded_set & disease_hpo_terms):
-            has_penalty = True
-            sim_score *= 0.5
-
-        scored.append((
-            sim_score,
-            disease_id,
-            matched,
-            missing,
-            extra,
-            coverage,
-            has_penalty,
-        ))
+    matrix = _matrix_for(disease_to_hpo, disease_ancestors, ic_scores)
+    scores, penalised = matrix.score(patient_ancestors, excluded_set)
 
     # ------------------------------------------------------------------
-    # 3. Sort and return top 15
+    # 3. Sort and return top 15.  Scores are sums of the same IC values in
+    #    varying order, so equal overlaps can differ in the last bits;
+    #    rounding first lets the stable sort keep ties in load order.
     # ------------------------------------------------------------------
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top = scored[:15]
+    top = np.argsort(-np.round(scores, 9), kind="stable")[:15]
 
     results: list[DiseaseCandidate] = []
-    for rank, (score, did, matched, missing, extra, cov, pen) in enumerate(top, 1):
-        results.append(DiseaseCandidate(
+    for rank, row in enumerate(top.tolist(), 1):
+        did = matrix.disease_ids[row]
+        disease_hpo_terms = disease_to_hpo[did]
+        matched = patient_set & disease_hpo_terms
+        missing = disease_hpo_terms - patient_set
+        extra = patient_set - disease_hpo_terms
+        cov = len(matched) / len(disease_hpo_terms) if disease_hpo_terms else 0.0
+        # Every field is computed here with its final type — skip validation
+        results.append(DiseaseCandidate.model_construct(
             rank=rank,
             disease_id=did,
             disease_name=disease_to_name.get(did, ""),
-            sim_score=round(score, 4),
+            sim_score=round(float(scores[row]), 4),
             matched_terms=sorted(matched),
             missing_terms=sorted(missing),
             extra_terms=sorted(extra),
             coverage_pct=round(cov, 4),
-            excluded_penalty=pen,
+            excluded_penalty=bool(penalised[row]),
         ))
 
     return results
+
+
+# ── Sparse disease × term layout ────────────────────────────────────
+
+class _DiseaseMatrix:
+    """
+    Every disease's ancestor closure and direct terms in CSR-style arrays.
+
+    A disease's score is the IC summed over the ancestors it shares with
+    the patient, i.e. one sparse product of the disease × term incidence
+    matrix with the patient's IC-weighted indicator vector.
+    """
+
+    def __init__(
+        self,
+        disease_to_hpo: dict[str, frozenset],
+        disease_ancestors: dict[str, frozenset],
+        ic_scores: dict[str, float],
+    ) -> None:
+        self.disease_ids: list[str] = list(disease_to_hpo)
+        self.term_col: dict[str, int] = {}
+        col = self.term_col.setdefault
+
+        anc_rows: list[int] = []
+        anc_cols: list[int] = []
+        hpo_rows: list[int] = []
+        hpo_cols: list[int] = []
+        for row, did in enumerate(self.disease_ids):
+            ancestors = [col(t, len(self.term_col)) for t in disease_ancestors.get(did, ())]
+            anc_cols.extend(ancestors)
+            anc_rows.extend([row] * len(ancestors))
+            terms = [col(t, len(self.term_col)) for t in disease_to_hpo[did]]
+            hpo_cols.extend(terms)
+            hpo_rows.extend([row] * len(terms))
+
+        self.anc_rows = np.array(anc_rows, dtype=np.intp)
+        self.anc_cols = np.array(anc_cols, dtype=np.intp)
+        self.hpo_rows = np.array(hpo_rows, dtype=np.intp)
+        self.hpo_cols = np.array(hpo_cols, dtype=np.intp)
+        self.ic = np.array([ic_scores.get(t, 0.0) for t in self.term_col], dtype=np.float64)
+
+    def _indicator(self, terms: set[str]) -> np.ndarray:
+        cols = [c for c in map(self.term_col.get, terms) if c is not None]
+        vec = np.zeros(len(self.term_col), dtype=np.float64)
+        vec[cols] = 1.0
+        return vec
+
+    def score(self, patient_ancestors: set[str], excluded: set[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Return per-disease similarity scores and exclusion-penalty flags."""
+        n = len(self.disease_ids)
+        weights = self._indicator(patient_ancestors) * self.ic
+        scores = np.bincount(self.anc_rows, weights=weights[self.anc_cols], minlength=n)
+
+        if excluded:
+            hits = np.bincount(
+                self.hpo_rows, weights=self._indicator(excluded)[self.hpo_cols], minlength=n
+            )
+            penalised = hits > 0
+            scores[penalised] *= 0.5
+        else:
+            penalised = np.zeros(n, dtype=bool)
+        return scores, penalised
+
+
+# Built on first use and reused while load_all's dicts stay the same objects.
+# The cache is keyed on identity, not contents: treat those dicts as
+# read-only after load_all, and call clear_matrix_cache() if one is ever
+# modified in place.
+_matrix_cache: tuple[tuple[dict, dict, dict], _DiseaseMatrix] | None = None
+
+
+def clear_matrix_cache() -> None:
+    """Drop the cached disease matrix so the next ``run`` rebuilds it."""
+    global _matrix_cache
+    _matrix_cache = None
+
+
+def _matrix_for(
+    disease_to_hpo: dict[str, frozenset],
+    disease_ancestors: dict[str, frozenset],
+    ic_scores: dict[str, float],
+) -> _DiseaseMatrix:
+    global _matrix_cache
+    sources = (disease_to_hpo, disease_ancestors, ic_scores)
+    cached = _matrix_cache
+    if cached is None or any(a is not b for a, b in zip(cached[0], sources)):
+        cached = _matrix_cache = (sources, _DiseaseMatrix(*sources))
+    return cached[1]
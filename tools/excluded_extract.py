@@ -63,6 +63,35 @@ def _map_to_hpo(
 
 # ── public API ──────────────────────────────────────────────────────────
 
+def build_findings(items: list, synonym_index: dict) -> list[ExcludedFinding]:
+    """Turn parsed LLM items into :class:`ExcludedFinding` objects.
+
+    Shared with ``tools.combined_extract``, which returns the same item
+    shape under its ``"excluded"`` key.
+    """
+    results: list[ExcludedFinding] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+
+        finding_text = item.get("finding", "")
+        hpo_id, hpo_label = _map_to_hpo(finding_text, synonym_index)
+
+        try:
+            ef = ExcludedFinding(
+                raw_text=item.get("raw_text", ""),
+                mapped_hpo_term=hpo_id,
+                mapped_hpo_label=hpo_label,
+                exclusion_type=item.get("exclusion_type", "explicit"),
+                confidence=item.get("confidence", "medium"),
+            )
+            results.append(ef)
+        except Exception:
+            logger.warning("Skipping malformed excluded finding: %s", item)
+
+    return results
+
+
 def run(note_text: str, synonym_index: dict) -> list[ExcludedFinding]:
     """
     Identify phenotypic findings that are explicitly or softly excluded.
@@ -103,25 +132,4 @@ def run(note_text: str, synonym_index: dict) -> list[ExcludedFinding]:
         logger.warning("Expected JSON array from excluded_extract, got %s", type(items).__name__)
         return []
 
-    # Build ExcludedFinding objects
-    results: list[ExcludedFinding] = []
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-
-        finding_text = item.get("finding", "")
-        hpo_id, hpo_label = _map_to_hpo(finding_text, synonym_index)
-
-        try:
-            ef = ExcludedFinding(
-                raw_text=item.get("raw_text", ""),
-                mapped_hpo_term=hpo_id,
-                mapped_hpo_label=hpo_label,
-                exclusion_type=item.get("exclusion_type", "explicit"),
-                confidence=item.get("confidence", "medium"),
-            )
-            results.append(ef)
-        except Exception:
-            logger.warning("Skipping malformed excluded finding: %s", item)
-
-    return results
+    return build_findings(items, synonym_index)
@@ -9,6 +9,7 @@ detection must be reproducible and explainable.
 
 from __future__ import annotations
 
+import hpo_functions
 from core.models import RedFlag
 
 
@@ -51,8 +52,8 @@ def run(patient_hpo_ids: list[str], ontology) -> list[RedFlag]:
     ----------
     patient_hpo_ids : list[str]
         HPO IDs observed in the patient.
-    ontology : pronto.Ontology
-        The parsed ``hp.obo`` ontology object (``data["ontology"]``).
+    ontology : hpo_functions.AncestorIndex | pronto.Ontology
+        The HPO superclass lookup (``data["ontology"]``).
 
     Returns
     -------
@@ -68,9 +69,7 @@ def run(patient_hpo_ids: list[str], ontology) -> list[RedFlag]:
 
     for hpo_id in patient_hpo_ids:
         try:
-            ancestors = set()
-            for parent in ontology[hpo_id].superclasses():
-                ancestors.add(parent.id)
+            ancestors = set(hpo_functions.get_superclass_ids(ontology, hpo_id))
             term_ancestors[hpo_id] = ancestors
             all_ancestors.update(ancestors)
         except Exception:
@@ -47,6 +47,41 @@ def _normalise_onset_stage(onset_normalized: float) -> str:
 
 # ── public API ──────────────────────────────────────────────────────────
 
+def build_profiles(items: list) -> list[TimingProfile]:
+    """Turn parsed LLM items into :class:`TimingProfile` objects.
+
+    Shared with ``tools.combined_extract``, which returns the same item
+    shape under its ``"timing"`` key.
+    """
+    results: list[TimingProfile] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+
+        onset_norm = float(item.get("onset_normalized", 0.0))
+        onset_stage = _normalise_onset_stage(onset_norm)
+        phenotype_ref = item.get("phenotype_ref", "")
+
+        try:
+            tp = TimingProfile(
+                phenotype_ref=phenotype_ref,
+                phenotype_label=phenotype_ref,  # LLM returns label as ref
+                onset=item.get("onset", "unknown"),
+                onset_normalized=onset_norm,
+                onset_stage=onset_stage,
+                resolution=item.get("resolution"),
+                is_ongoing=item.get("is_ongoing", True),
+                progression=item.get("progression", "stable"),
+                raw_evidence=item.get("raw_evidence", ""),
+                confidence=item.get("confidence", "medium"),
+            )
+            results.append(tp)
+        except Exception:
+            logger.warning("Skipping malformed timing item: %s", item)
+
+    return results
+
+
 def run(note_text: str, hpo_labels: list[str]) -> list[TimingProfile]:
     """
     Extract temporal information (onset, progression, resolution) for phenotypes.
@@ -96,31 +131,4 @@ def run(note_text: str, hpo_labels: list[str]) -> list[TimingProfile]:
         logger.warning("Expected JSON array from timing_extract, got %s", type(items).__name__)
         return []
 
-    # Build TimingProfile objects
-    results: list[TimingProfile] = []
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-
-        onset_norm = float(item.get("onset_normalized", 0.0))
-        onset_stage = _normalise_onset_stage(onset_norm)
-        phenotype_ref = item.get("phenotype_ref", "")
-
-        try:
-            tp = TimingProfile(
-                phenotype_ref=phenotype_ref,
-                phenotype_label=phenotype_ref,  # LLM returns label as ref
-                onset=item.get("onset", "unknown"),
-                onset_normalized=onset_norm,
-                onset_stage=onset_stage,
-                resolution=item.get("resolution"),
-                is_ongoing=item.get("is_ongoing", True),
-                progression=item.get("progression", "stable"),
-                raw_evidence=item.get("raw_evidence", ""),
-                confidence=item.get("confidence", "medium"),
-            )
-            results.append(tp)
-        except Exception:
-            logger.warning("Skipping malformed timing item: %s", item)
-
-    return results
+    return build_profiles(items)